@@ -1,19 +1,471 @@
 import mysql.connector
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, send_from_directory, url_for, g, has_request_context
+from itsdangerous import URLSafeSerializer, URLSafeTimedSerializer, BadData
+import click
 import os
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
-from db_config import DB_CONFIG
+import time
+import hashlib
+import itertools
+import threading
+import math
+import functools
+import mimetypes
+import random
+import hmac
+from collections import OrderedDict
+from db_config import DB_CONFIG, REPLICA_DB_CONFIG
+from db_router import DatabaseRouter, mysql_pool_factory, mysql_replica_lag
+from storage import DATABASE_ERRORS, sqlite_factory, create_sqlite_schema
+from timer_wheel import TimerWheel
+from rate_limit import RateLimiter, AdmissionGate
+from session_registry import ShardedSessionRegistry, ConsistentHashRing
+import asset_pipeline
+import archive
+from response_encoding import json_response, cache_encoded, get_cached, serve_cached
+from profiling import SamplingProfiler
 
 app = Flask(__name__)
+# Never pretty-print JSON, even when running in debug mode
+app.json.compact = True
+# Signs resume tokens; set QUIZ_SECRET_KEY so tokens survive restarts and work on every worker
+app.secret_key = os.environ.get('QUIZ_SECRET_KEY') or os.urandom(32)
+
+# Seconds participants have to answer each question
+QUESTION_TIME_LIMIT = int(os.environ.get('QUIZ_QUESTION_TIME_LIMIT', 30))
+# Extra seconds accepted after the deadline to absorb network latency
+LATE_ANSWER_GRACE = float(os.environ.get('QUIZ_LATE_ANSWER_GRACE', 2))
+# Move to the next question automatically when the timer expires
+AUTO_ADVANCE_QUESTIONS = os.environ.get('QUIZ_AUTO_ADVANCE', '0') == '1'
+
+# Seconds a participant's resume token, or a host's token, stays valid
+RESUME_TOKEN_MAX_AGE = int(os.environ.get('QUIZ_RESUME_TOKEN_MAX_AGE', 12 * 3600))
+
+# Page sizes of the host responses and participants endpoints
+RESPONSES_PAGE_SIZE = 100
+MAX_RESPONSES_PAGE_SIZE = 500
+
+# Join bursts allowed per session, and per client (see client_key)
+join_session_limiter = RateLimiter(
+    rate=float(os.environ.get('QUIZ_JOIN_RATE', 100)),
+    capacity=float(os.environ.get('QUIZ_JOIN_BURST', 300))
+)
+join_client_limiter = RateLimiter(
+    rate=float(os.environ.get('QUIZ_JOIN_CLIENT_RATE', 1)),
+    capacity=float(os.environ.get('QUIZ_JOIN_CLIENT_BURST', 5))
+)
+# Answer bursts allowed per session or individually taken quiz, and per client
+submit_session_limiter = RateLimiter(
+    rate=float(os.environ.get('QUIZ_SUBMIT_RATE', 500)),
+    capacity=float(os.environ.get('QUIZ_SUBMIT_BURST', 2000))
+)
+submit_client_limiter = RateLimiter(
+    rate=float(os.environ.get('QUIZ_SUBMIT_CLIENT_RATE', 2)),
+    capacity=float(os.environ.get('QUIZ_SUBMIT_CLIENT_BURST', 5))
+)
+# Requests allowed to do database work at once, the rest wait briefly or get a 429
+db_admission = AdmissionGate(
+    max_concurrent=int(os.environ.get('QUIZ_DB_CONCURRENCY', 16)),
+    max_queued=int(os.environ.get('QUIZ_DB_QUEUE', 256)),
+    wait_seconds=float(os.environ.get('QUIZ_DB_QUEUE_WAIT', 2))
+)
+
+# Bump whenever init_db, check_and_add_columns or storage.SQLITE_SCHEMA change the schema
+SCHEMA_VERSION = 3
+# 'mysql', or 'sqlite' for an embedded database file that needs no server
+STORAGE_BACKEND = os.environ.get('QUIZ_STORAGE', 'mysql')
+SQLITE_PATH = os.environ.get('QUIZ_SQLITE_PATH', 'quiz.db')
+# Optional copy of the SQLite file used as a read replica, e.g. to try replica routing locally
+SQLITE_REPLICA_PATH = os.environ.get('QUIZ_SQLITE_REPLICA_PATH')
+# Pooled database connections, opened lazily by the first request that needs one
+DB_POOL_SIZE = int(os.environ.get('QUIZ_DB_POOL_SIZE', 16))
+# Replica reads are skipped while replication lags more than this many seconds
+MAX_REPLICA_LAG = float(os.environ.get('QUIZ_MAX_REPLICA_LAG', 5))
+# Seconds a client's reads stay on the primary after it wrote something
+READ_YOUR_WRITES_SECONDS = int(os.environ.get('QUIZ_READ_YOUR_WRITES_SECONDS', 10))
+STICKY_COOKIE = 'quiz_db_sticky'
+
+if STORAGE_BACKEND == 'sqlite':
+    db_router = DatabaseRouter(
+        primary=sqlite_factory(SQLITE_PATH, DB_POOL_SIZE),
+        replica=sqlite_factory(SQLITE_REPLICA_PATH, DB_POOL_SIZE) if SQLITE_REPLICA_PATH else None,
+        errors=DATABASE_ERRORS
+    )
+else:
+    db_router = DatabaseRouter(
+        primary=mysql_pool_factory('quiz_pool', DB_CONFIG, DB_POOL_SIZE),
+        replica=mysql_pool_factory('quiz_replica_pool', REPLICA_DB_CONFIG, DB_POOL_SIZE) if REPLICA_DB_CONFIG else None,
+        lag_probe=mysql_replica_lag,
+        max_lag_seconds=MAX_REPLICA_LAG,
+        errors=DATABASE_ERRORS
+    )
+# Set once ensure_schema has verified the schema in this process
+schema_ready = False
+schema_lock = threading.Lock()
 
 # In-memory storage for active quiz sessions
-active_sessions = {}
+active_sessions = ShardedSessionRegistry(int(os.environ.get('QUIZ_SESSION_SHARDS', 16)))
+
+# Worker nodes that live sessions are pinned to, e.g. "10.0.0.1:5000,10.0.0.2:5000"
+worker_ring = ConsistentHashRing([node for node in os.environ.get('QUIZ_WORKER_NODES', '').split(',') if node])
+
+# Single scheduler thread for the question timers of every live session
+question_timers = TimerWheel()
+
+def request_json():
+    """Get the JSON body of the current request, or an empty dict"""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+def too_many_requests(retry_after, error):
+    """Build a 429 response telling the client when to retry"""
+    response = jsonify({'success': False, 'error': error, 'retry_after': round(retry_after, 2)})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def rate_limited(limiter, key_func):
+    """Reject requests whose key has exhausted its token bucket"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            allowed, retry_after = limiter.check(key_func())
+            if not allowed:
+                return too_many_requests(retry_after, 'Too many requests, please retry shortly')
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def client_key(claimed_identity):
+    """Build the rate limit key function of the client making a request
+
+    A client is the participant of a valid resume token when the request
+    carries one. Otherwise it is keyed by the identity it claims, e.g. session
+    code and name, rather than by address, which a whole classroom behind one
+    NAT or every client behind a proxy shares. Claimed identities can be made
+    up, so the per-session bucket is what caps those requests.
+    """
+    def key():
+        token = request_json().get('resume_token')
+        resumed = read_resume_token(token) if token else None
+        if resumed is not None:
+            return ('participant', *resumed)
+        return ('claimed', claimed_identity())
+    return key
+
+def submit_room_key():
+    """Rate limit key of the live session an answer is for, or of the quiz taken individually"""
+    data = request_json()
+    if data.get('session_code'):
+        return ('session', data['session_code'])
+    return ('quiz', str(data.get('quiz_id')))
+
+def host_required(view):
+    """Answer 403 unless the request carries the host token of the session in the URL"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_session_host(kwargs['session_code']):
+            return jsonify({'error': 'Host token required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def admission_controlled(view):
+    """Run a view only once the database admission gate lets it in"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with db_admission.admit() as admitted:
+            if not admitted:
+                return too_many_requests(db_admission.wait_seconds, 'Server is busy, please retry shortly')
+            return view(*args, **kwargs)
+    return wrapper
+
+def new_session(quiz_id, total_questions):
+    """Build the in-memory state for a live quiz session"""
+    return {
+        'quiz_id': quiz_id,
+        'current_question': 0,
+        'status': 'waiting',  # waiting, active, results
+        'participants': [],
+        'participants_by_id': {},  # Indexes over participants, for joins and resumes
+        'participants_by_name': {},  # (name, is_host) -> participant
+        'responses': {},  # Track responses for each question
+        'answer_counts': {},  # Per question histogram of answer_id -> count
+        'player_count': 0,  # Participants who are not the host
+        'idempotency_keys': set(),  # Keys of answers already stored
+        'total_questions': total_questions,
+        'quiz_version': None,  # Quiz version pinned when the session starts
+        'content_hash': None,
+        'question_ids': [],  # Of the pinned version, in display order
+        'question_started_at': None,  # Epoch seconds, set by the server
+        'question_deadline': None
+    }
+
+def start_question_timer(session_code, session):
+    """Record the start and deadline of the current question"""
+    now = time.time()
+    session['question_started_at'] = now
+    session['question_deadline'] = now + QUESTION_TIME_LIMIT
+
+    if AUTO_ADVANCE_QUESTIONS:
+        # Wait out the grace period too, answers sent just before the deadline still count
+        question_timers.schedule(
+            session_code, QUESTION_TIME_LIMIT + LATE_ANSWER_GRACE,
+            auto_advance, session_code, session['current_question']
+        )
+    else:
+        question_timers.cancel(session_code)
+
+def stop_question_timer(session_code, session):
+    """Clear the question deadline and cancel any pending auto-advance"""
+    session['question_started_at'] = None
+    session['question_deadline'] = None
+    question_timers.cancel(session_code)
+
+def advance_session(session_code, session):
+    """Move a session to its next question, or to results after the last one"""
+    with active_sessions.lock_for(session_code):
+        total_questions = session.get('total_questions', 0)
+
+        # Check if we're at the last question
+        if session['current_question'] >= total_questions - 1:
+            # End the quiz if it's the last question
+            session['status'] = 'results'
+            stop_question_timer(session_code, session)
+            return 'quiz_ended'
+
+        # Move to next question
+        session['current_question'] += 1
+        session['status'] = 'active'  # Set to active when moving to next question
+        start_question_timer(session_code, session)
+        return 'next_question'
+
+def auto_advance(session_code, question_index):
+    """Timer callback that advances a session whose question deadline passed"""
+    session = active_sessions.get(session_code)
+    if not session:
+        return
+    with active_sessions.lock_for(session_code):
+        # Ignore timers made stale by the host advancing, ending or restarting the quiz
+        if session['status'] != 'active' or session['current_question'] != question_index:
+            return
+        advance_session(session_code, session)
+
+def live_question_index(session, question_id):
+    """Index of question_id in a live session, the current question for unpinned sessions"""
+    if not session['question_ids']:
+        return session.get('current_question', 0)
+    try:
+        return session['question_ids'].index(question_id)
+    except ValueError:
+        return None
+
+def record_live_response(session, participant_id, question_index, answer_id):
+    """Store a live answer and keep the per-question answer histogram in step"""
+    current_q = str(question_index)
+    question_responses = session['responses'].setdefault(current_q, {})
+    counts = session['answer_counts'].setdefault(current_q, {})
+
+    # A participant changing their answer moves their vote to the new answer
+    previous = question_responses.get(str(participant_id))
+    if previous is not None:
+        previous_key = str(previous['answer_id'])
+        counts[previous_key] -= 1
+        if not counts[previous_key]:
+            del counts[previous_key]
+
+    question_responses[str(participant_id)] = {
+        'answer_id': answer_id,
+        'timestamp': datetime.now().isoformat()
+    }
+    counts[str(answer_id)] = counts.get(str(answer_id), 0) + 1
+
+def is_duplicate_submission(session, participant_id, question_index, answer_id, idempotency_key=None):
+    """Check whether an answer was already stored for a question"""
+    if idempotency_key and idempotency_key in session['idempotency_keys']:
+        return True
+    current_q = str(question_index)
+    previous = session['responses'].get(current_q, {}).get(str(participant_id))
+    return previous is not None and previous['answer_id'] == answer_id
+
+def add_session_participant(session, participant_id, participant_name, is_host):
+    """Add a participant to a live session once, returning the stored participant"""
+    participant = session['participants_by_name'].get((participant_name, is_host))
+    if participant is None:
+        participant = {
+            'id': participant_id,
+            'name': participant_name,
+            'is_host': is_host,
+            'score': 0  # Correct answers, copied from participant_scores by submit_answer
+        }
+        session['participants'].append(participant)
+        session['participants_by_id'][participant_id] = participant
+        session['participants_by_name'][(participant_name, is_host)] = participant
+        if not is_host:
+            session['player_count'] += 1
+    return participant
+
+def issue_resume_token(session_code, participant_id):
+    """Sign a token that lets a participant resume their place in a session"""
+    serializer = URLSafeTimedSerializer(app.secret_key, salt='quiz-session-resume')
+    return serializer.dumps([session_code, participant_id])
+
+def read_resume_token(token):
+    """Get (session_code, participant_id) from a resume token, or None if forged or expired"""
+    serializer = URLSafeTimedSerializer(app.secret_key, salt='quiz-session-resume')
+    try:
+        session_code, participant_id = serializer.loads(token, max_age=RESUME_TOKEN_MAX_AGE)
+    except (BadData, TypeError, ValueError):
+        return None
+    return session_code, participant_id
+
+def issue_host_key(quiz_id):
+    """Sign the key that proves the holder created a quiz, handed out by create_quiz only"""
+    return URLSafeSerializer(app.secret_key, salt='quiz-host-key').dumps(int(quiz_id))
+
+def is_quiz_creator(quiz_id, host_key):
+    """Check a host key returned by create_quiz against a quiz id"""
+    if not host_key:
+        return False
+    try:
+        return URLSafeSerializer(app.secret_key, salt='quiz-host-key').loads(host_key) == int(quiz_id)
+    except (BadData, TypeError, ValueError):
+        return False
+
+def issue_host_token(session_code):
+    """Sign a token that lets the host of a session read its participants and responses"""
+    serializer = URLSafeTimedSerializer(app.secret_key, salt='quiz-session-host')
+    return serializer.dumps(session_code)
+
+def is_session_host(session_code):
+    """Check whether the current request carries a valid host token for the session"""
+    token = request.headers.get('X-Host-Token')
+    if not token:
+        return False
+    serializer = URLSafeTimedSerializer(app.secret_key, salt='quiz-session-host')
+    try:
+        return serializer.loads(token, max_age=RESUME_TOKEN_MAX_AGE) == session_code
+    except BadData:
+        return False
+
+def participant_progress(session, participant):
+    """State a reconnecting participant needs to pick up where they left off"""
+    participant_key = str(participant['id'])
+    answers = {
+        question: responses[participant_key]['answer_id']
+        for question, responses in session['responses'].items()
+        if participant_key in responses
+    }
+    return dict(
+        session_status_payload(session),
+        participant_id=participant['id'],
+        participant_name=participant['name'],
+        is_host=participant['is_host'],
+        score=participant['score'],
+        answers=answers
+    )
+
+def session_status_payload(session, role=None):
+    """Project the session state returned to status polls
+
+    Participants only get the few fields they need to follow the quiz, the
+    host, once its host token is checked, also gets player and per-question
+    response counts. Participants and raw responses are only available
+    through the paginated /lobby_participants and /responses routes.
+    """
+    status = {
+        'status': session['status'],
+        'current_question': session['current_question'],
+        'total_questions': session['total_questions'],
+        'question_deadline': session['question_deadline'],
+        'participant_count': len(session['participants']),
+        'content_hash': session.get('content_hash'),  # Lets clients fetch the immutable quiz version
+        'server_time': round(time.time(), 3)  # Lets clients sync their countdown
+    }
+
+    if role == 'host':
+        status['player_count'] = session['player_count']
+        status['response_counts'] = {question: len(responses) for question, responses in session['responses'].items()}
+
+    return status
+
+def is_late_answer(session):
+    """Check whether an answer arriving now misses the current question deadline"""
+    deadline = session.get('question_deadline')
+    return deadline is not None and time.time() > deadline + LATE_ANSWER_GRACE
 
 def get_db_connection():
-    """Create a database connection"""
-    return mysql.connector.connect(**DB_CONFIG)
+    """Get a primary database connection, for writes and read-modify-write work"""
+    if has_request_context():
+        # Later reads by this client must see what it is about to write
+        g.db_wrote = True
+    return db_router.write_connection()
+
+def get_read_connection():
+    """Get a connection for read-only queries, from the replica when it is safe"""
+    sticky_until = request.cookies.get(STICKY_COOKIE, type=float) if has_request_context() else None
+    return db_router.read_connection(prefer_primary=bool(sticky_until and sticky_until > time.time()))
+
+@app.after_request
+def set_read_your_writes_cookie(response):
+    # Pin this client's reads to the primary until the replica has caught up with its writes
+    if g.get('db_wrote') and db_router.replica is not None:
+        response.set_cookie(STICKY_COOKIE, str(time.time() + READ_YOUR_WRITES_SECONDS),
+                            max_age=READ_YOUR_WRITES_SECONDS, httponly=True, samesite='Lax')
+    return response
+
+def ensure_schema():
+    """Create or migrate the schema once per process, skipped when the marker is current
+
+    A fresh worker only runs a single SELECT against the schema_version
+    marker; the CREATE TABLE and SHOW COLUMNS probes only run when the
+    marker is missing or older than SCHEMA_VERSION.
+    """
+    global schema_ready
+    if schema_ready:
+        return True
+    with schema_lock:
+        if schema_ready:
+            return True
+
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            result = cursor.fetchone()
+            cursor.close()
+            conn.close()
+            current_version = result[0] if result else None
+        except DATABASE_ERRORS:
+            # Missing database or marker table, build the schema from scratch
+            current_version = None
+
+        # A newer marker means a newer worker already migrated, e.g. during a rolling deploy
+        if current_version is None or current_version < SCHEMA_VERSION:
+            if STORAGE_BACKEND == 'sqlite':
+                if not init_sqlite_db():
+                    return False
+            elif not init_db() or not check_and_add_columns():
+                return False
+            try:
+                conn = get_db_connection()
+                cursor = conn.cursor()
+                # Never move the marker backwards past a version written meanwhile
+                cursor.execute("DELETE FROM schema_version WHERE version < %s", (SCHEMA_VERSION,))
+                cursor.execute("SELECT MAX(version) FROM schema_version")
+                if cursor.fetchone()[0] is None:
+                    cursor.execute("INSERT INTO schema_version (version) VALUES (%s)", (SCHEMA_VERSION,))
+                conn.commit()
+                cursor.close()
+                conn.close()
+            except DATABASE_ERRORS as err:
+                print(f"Error recording schema version: {err}")
+                return False
+            print(f"Database schema is at version {SCHEMA_VERSION}")
+
+        schema_ready = True
+        return True
 
 def init_db():
     """Initialize the database with required tables"""
@@ -84,17 +536,82 @@ def init_db():
                 question_id INT NOT NULL,
                 answer_id INT,
                 responded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY uniq_participant_question (participant_id, question_id),
                 FOREIGN KEY (participant_id) REFERENCES participants(id) ON DELETE CASCADE,
                 FOREIGN KEY (question_id) REFERENCES questions(id) ON DELETE CASCADE,
                 FOREIGN KEY (answer_id) REFERENCES answers(id) ON DELETE SET NULL
             )
         """)
         
+        # Create quiz versions table, immutable snapshots of quiz content
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS quiz_versions (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                quiz_id INT NOT NULL,
+                version INT NOT NULL,
+                content_hash CHAR(64) NOT NULL,
+                content MEDIUMTEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY uniq_quiz_version (quiz_id, version),
+                INDEX idx_versions_hash (content_hash),
+                FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+            )
+        """)
+        
+        # Create participant scores table, a summary of responses kept up to date by submit_answer
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS participant_scores (
+                participant_id INT PRIMARY KEY,
+                quiz_id INT NOT NULL,
+                answered_questions INT NOT NULL DEFAULT 0,
+                correct_answers INT NOT NULL DEFAULT 0,
+                -- Part of the above whose responses were moved to cold storage
+                archived_answered INT NOT NULL DEFAULT 0,
+                archived_correct INT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                INDEX idx_scores_quiz (quiz_id, correct_answers),
+                FOREIGN KEY (participant_id) REFERENCES participants(id) ON DELETE CASCADE
+            )
+        """)
+        
+        # Create response archives table, one row per file of responses moved to cold storage
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS response_archives (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                quiz_id INT NOT NULL,
+                archive_path VARCHAR(255) NOT NULL,
+                participants INT NOT NULL,
+                responses INT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_archives_quiz (quiz_id),
+                FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+            )
+        """)
+        
+        # Create schema version table, lets new workers skip the checks above
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT NOT NULL
+            )
+        """)
+        
         conn.commit()
         cursor.close()
         conn.close()
         print("Database initialized successfully")
-    except mysql.connector.Error as err:
+    except DATABASE_ERRORS as err:
+        print(f"Error initializing database: {err}")
+        return False
+    return True
+
+def init_sqlite_db():
+    """Initialize an embedded SQLite database with required tables"""
+    try:
+        conn = get_db_connection()
+        create_sqlite_schema(conn)
+        conn.close()
+        print(f"SQLite database initialized at {SQLITE_PATH}")
+    except DATABASE_ERRORS as err:
         print(f"Error initializing database: {err}")
         return False
     return True
@@ -141,17 +658,638 @@ def check_and_add_columns():
             cursor.execute("ALTER TABLE questions ADD COLUMN question_number INT DEFAULT 1")
             print("Added question_number column to questions table")
         
+        # Check if participant_scores keeps the counts of archived responses
+        cursor.execute("SHOW COLUMNS FROM participant_scores LIKE 'archived_answered'")
+        result = cursor.fetchone()
+        
+        if not result:
+            cursor.execute("""
+                ALTER TABLE participant_scores
+                ADD COLUMN archived_answered INT NOT NULL DEFAULT 0,
+                ADD COLUMN archived_correct INT NOT NULL DEFAULT 0
+            """)
+            print("Added archived score columns to participant_scores table")
+        
+        # Check if responses are unique per participant and question
+        cursor.execute("SHOW INDEX FROM responses WHERE Key_name = 'uniq_participant_question'")
+        result = cursor.fetchall()
+        
+        if not result:
+            # Keep only the latest response of each participant to each question, then add the key
+            cursor.execute("""
+                DELETE older FROM responses older
+                JOIN responses newer
+                  ON newer.participant_id = older.participant_id
+                 AND newer.question_id = older.question_id
+                 AND newer.id > older.id
+            """)
+            print(f"Removed {cursor.rowcount} duplicate rows from responses table")
+            cursor.execute("ALTER TABLE responses ADD UNIQUE KEY uniq_participant_question (participant_id, question_id)")
+            print("Added unique participant/question key to responses table")
+            conn.commit()
+        
         cursor.close()
         conn.close()
         return True
-    except mysql.connector.Error as err:
+    except DATABASE_ERRORS as err:
         print(f"Error checking/adding columns: {err}")
         return False
 
+# Quizzes idle for this many days are moved to cold storage by `flask archive-quizzes`
+ARCHIVE_AFTER_DAYS = int(os.environ.get('QUIZ_ARCHIVE_AFTER_DAYS', 30))
+ARCHIVE_DIR = os.environ.get('QUIZ_ARCHIVE_DIR', archive.ARCHIVE_DIR)
+
+# Maximum number of participants returned by the batch results route
+MAX_BATCH_RESULTS = 1000
+# Maximum number of finished results kept in memory
+RESULTS_CACHE_SIZE = 10000
+
+# Results of participants who finished their quiz, keyed by participant id
+finished_results = OrderedDict()
+finished_results_lock = threading.Lock()
+
+def fetch_question_rows(cursor, quiz_id):
+    """Get the questions of a quiz joined with their answers, in display order"""
+    cursor.execute("""
+        SELECT q.id as question_id, q.question_text, q.question_number,
+               a.id as answer_id, a.answer_text, a.is_correct
+        FROM questions q
+        LEFT JOIN answers a ON q.id = a.question_id
+        WHERE q.quiz_id = %s
+        ORDER BY q.question_number, q.id, a.id
+    """, (quiz_id,))
+    return cursor.fetchall()
+
+def assemble_quiz_results(participant_name, question_rows, selected):
+    """Build the results of one participant in a single pass over the question rows
+
+    selected maps question_id -> the answer_id the participant picked.
+    """
+    questions = []
+    question = None
+    correct_answers = 0
+
+    for row in question_rows:
+        if question is None or question['id'] != row['question_id']:
+            question = {
+                'id': row['question_id'],
+                'question_text': row['question_text'],
+                'question_number': row['question_number'],
+                'answers': [],
+                'selected_answer_id': selected.get(row['question_id']),
+                'is_correct': False
+            }
+            questions.append(question)
+
+        if row['answer_id']:
+            question['answers'].append({
+                'id': row['answer_id'],
+                'answer_text': row['answer_text'],
+                'is_correct': row['is_correct']
+            })
+
+            # Check if this is the selected answer and if it's correct
+            if question['selected_answer_id'] == row['answer_id'] and row['is_correct']:
+                question['is_correct'] = True
+                correct_answers += 1
+
+    total_questions = len(questions)
+    return {
+        'participant_name': participant_name,
+        'questions': questions,
+        'total_questions': total_questions,
+        'correct_answers': correct_answers,
+        'score': f"{correct_answers}/{total_questions}",
+        'percentage': total_questions > 0 and round((correct_answers / total_questions) * 100, 1) or 0
+    }
+
+def is_quiz_finished(session_code):
+    """Check whether a participant's results can no longer change
+
+    Only a room this process holds and has seen end is known to be over.
+    Other workers, or individual quizzes whose answers can still be
+    changed, may take writes this process never hears about, so their
+    results are not cached.
+    """
+    session = active_sessions.get(session_code) if session_code else None
+    return session is not None and session['status'] == 'results'
+
+def get_results_connection(session_code=None):
+    """Connection for a results read, from the primary when the results will be cached
+
+    A replica may still miss the last answers of a room that just ended,
+    and cached results are never refreshed.
+    """
+    if is_quiz_finished(session_code):
+        return db_router.write_connection()
+    return get_read_connection()
+
+def get_cached_results(quiz_id, participant_id):
+    """Return the cached results of a finished participant, or None"""
+    with finished_results_lock:
+        entry = finished_results.get(participant_id)
+        if entry is None or entry[0] != quiz_id:
+            return None
+        finished_results.move_to_end(participant_id)
+        return entry[1]
+
+def cache_results(quiz_id, participant_id, quiz_results):
+    """Remember the results of a participant who finished the quiz"""
+    with finished_results_lock:
+        finished_results[participant_id] = (quiz_id, quiz_results)
+        finished_results.move_to_end(participant_id)
+        while len(finished_results) > RESULTS_CACHE_SIZE:
+            finished_results.popitem(last=False)
+
+def invalidate_results(participant_id):
+    """Forget the cached results of a participant whose answers changed"""
+    with finished_results_lock:
+        finished_results.pop(participant_id, None)
+
+def load_quiz_content(cursor, quiz):
+    """Get a quiz with its questions and answers as the nested API payload"""
+    cursor.execute("""
+        SELECT q.id, q.question_text, q.question_number,
+               a.id as answer_id, a.answer_text, a.image_url, a.is_correct
+        FROM questions q
+        LEFT JOIN answers a ON q.id = a.question_id
+        WHERE q.quiz_id = %s
+        ORDER BY q.question_number, q.id, a.id
+    """, (quiz['id'],))
+    
+    # Organize the data
+    questions = {}
+    for row in cursor.fetchall():
+        q_id = row['id']
+        if q_id not in questions:
+            questions[q_id] = {
+                'id': q_id,
+                'question_text': row['question_text'],
+                'question_number': row['question_number'],
+                'answers': []
+            }
+        
+        if row['answer_id']:
+            questions[q_id]['answers'].append({
+                'id': row['answer_id'],
+                'answer_text': row['answer_text'],
+                'image_url': row['image_url'],
+                'is_correct': bool(row['is_correct'])
+            })
+    
+    return {
+        'id': quiz['id'],
+        'title': quiz['title'],
+        'description': quiz['description'],
+        'questions': list(questions.values())
+    }
+
+def snapshot_quiz_version(cursor, quiz):
+    """Store the current content of a quiz as a new version if it changed
+
+    Versions are immutable and identified by the SHA-256 of their canonical
+    JSON, so anything derived from one can be cached forever under its hash.
+    Returns (version, content_hash, content).
+    """
+    content = load_quiz_content(cursor, quiz)
+    content_json = json.dumps(content, sort_keys=True, separators=(',', ':'), default=str)
+    content_hash = hashlib.sha256(content_json.encode('utf-8')).hexdigest()
+
+    cursor.execute(
+        "SELECT version, content_hash FROM quiz_versions WHERE quiz_id = %s ORDER BY version DESC LIMIT 1",
+        (quiz['id'],)
+    )
+    latest = cursor.fetchone()
+    if latest and latest['content_hash'] == content_hash:
+        return latest['version'], content_hash, content
+
+    version = latest['version'] + 1 if latest else 1
+    while True:
+        cursor.execute(
+            "INSERT IGNORE INTO quiz_versions (quiz_id, version, content_hash, content) VALUES (%s, %s, %s, %s)",
+            (quiz['id'], version, content_hash, content_json)
+        )
+        if cursor.rowcount:
+            break
+        # Another worker stored this version number first, a locking read sees its row
+        cursor.execute(
+            "SELECT version, content_hash FROM quiz_versions WHERE quiz_id = %s "
+            "ORDER BY version DESC LIMIT 1 LOCK IN SHARE MODE",
+            (quiz['id'],)
+        )
+        latest = cursor.fetchone()
+        if latest['content_hash'] == content_hash:
+            version = latest['version']
+            break
+        version = latest['version'] + 1
+    cache_encoded(f"quiz_version:{content_hash}", content_json.encode('utf-8'))
+    return version, content_hash, content
+
+def latest_quiz_version(cursor, quiz):
+    """Get the content hash of the newest version of a quiz
+
+    cursor may read from a replica, so quizzes that have no version yet are
+    snapshotted through a primary connection.
+    """
+    cursor.execute(
+        "SELECT content_hash FROM quiz_versions WHERE quiz_id = %s ORDER BY version DESC LIMIT 1",
+        (quiz['id'],)
+    )
+    latest = cursor.fetchone()
+    if latest:
+        return latest['content_hash']
+
+    conn = get_db_connection()
+    write_cursor = conn.cursor(dictionary=True)
+    _, content_hash, _ = snapshot_quiz_version(write_cursor, quiz)
+    conn.commit()
+    write_cursor.close()
+    conn.close()
+    return content_hash
+
+def pin_quiz_version(cursor, quiz, session):
+    """Pin a live session to the current version of its quiz"""
+    version, content_hash, content = snapshot_quiz_version(cursor, quiz)
+    session['quiz_version'] = version
+    session['content_hash'] = content_hash
+    session['total_questions'] = len(content['questions'])
+    session['question_ids'] = [question['id'] for question in content['questions']]
+
+def serve_quiz_version(content_hash):
+    """Serve a quiz version from the encoded cache, loading it once from the database"""
+    cache_key = f"quiz_version:{content_hash}"
+    entry = get_cached(cache_key)
+    if entry is None:
+        result = None
+        # A version written moments ago may not have reached the replica yet
+        for connect in (get_read_connection, db_router.write_connection):
+            conn = connect()
+            cursor = conn.cursor()
+            cursor.execute("SELECT content FROM quiz_versions WHERE content_hash = %s LIMIT 1", (content_hash,))
+            result = cursor.fetchone()
+            cursor.close()
+            conn.close()
+            if result:
+                break
+
+        if not result:
+            response = jsonify({'error': 'Quiz version not found'})
+            response.status_code = 404
+            return response
+        entry = cache_encoded(cache_key, result[0].encode('utf-8'))
+
+    response = serve_cached(entry)
+    response.set_etag(content_hash)
+    return response.make_conditional(request)
+
+# Aggregate of one or more participants' responses, upserted into participant_scores
+# on top of the counts of their responses already moved to cold storage
+SCORE_UPSERT_SQL = """
+    INSERT INTO participant_scores (participant_id, quiz_id, answered_questions, correct_answers)
+    SELECT p.id, p.quiz_id,
+           COUNT(r.id),
+           COALESCE(SUM(CASE WHEN a.is_correct = 1 THEN 1 ELSE 0 END), 0)
+    FROM participants p
+    LEFT JOIN responses r ON r.participant_id = p.id
+    LEFT JOIN answers a ON a.id = r.answer_id
+    WHERE {condition}
+    GROUP BY p.id, p.quiz_id
+    ON DUPLICATE KEY UPDATE
+        answered_questions = VALUES(answered_questions) + archived_answered,
+        correct_answers = VALUES(correct_answers) + archived_correct
+"""
+
+def refresh_participant_score(cursor, participant_id):
+    """Recompute the materialized score of one participant from their responses"""
+    cursor.execute(SCORE_UPSERT_SQL.format(condition="p.id = %s"), (participant_id,))
+
+def backfill_participant_scores(batch_size=1000):
+    """Rebuild participant_scores for every participant, in batches of ids"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM participants")
+    max_id = cursor.fetchone()[0]
+
+    for start in range(0, max_id, batch_size):
+        cursor.execute(SCORE_UPSERT_SQL.format(condition="p.id > %s AND p.id <= %s"), (start, start + batch_size))
+        conn.commit()
+
+    cursor.close()
+    conn.close()
+    return max_id
+
+@app.cli.command('backfill-scores')
+def backfill_scores_command():
+    """Fill participant_scores from the existing responses"""
+    max_id = backfill_participant_scores()
+    print(f"Backfilled participant scores up to participant {max_id}")
+
+def find_archivable_quizzes(cursor, cutoff, limit, after_quiz_id=0):
+    """Ids of quizzes with live responses whose participants have all been idle since before cutoff"""
+    cursor.execute("""
+        SELECT p.quiz_id
+        FROM participants p
+        LEFT JOIN responses r ON r.participant_id = p.id
+        WHERE p.quiz_id > %s
+        GROUP BY p.quiz_id
+        HAVING COUNT(r.id) > 0 AND MAX(COALESCE(r.responded_at, p.started_at)) < %s
+        ORDER BY p.quiz_id
+        LIMIT %s
+    """, (after_quiz_id, cutoff.strftime('%Y-%m-%d %H:%M:%S'), limit))
+    return [row[0] for row in cursor.fetchall()]
+
+def archive_quiz(quiz_id):
+    """Move the raw responses of a quiz to a cold storage file
+
+    Participants and their participant_scores summary rows stay in the
+    database. The counts of the moved responses are kept in the archived_*
+    columns, so leaderboards never read archives and later score refreshes
+    still include them. Returns (participants, responses) archived, or None
+    when there was nothing to move or another worker moved it first.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM participants WHERE quiz_id = %s", (quiz_id,))
+    max_id = cursor.fetchone()['max_id']
+    cursor.execute(SCORE_UPSERT_SQL.format(condition="p.quiz_id = %s AND p.id <= %s"), (quiz_id, max_id))
+    cursor.execute("""
+        SELECT r.participant_id, r.question_id, r.answer_id, r.responded_at
+        FROM responses r
+        JOIN participants p ON p.id = r.participant_id
+        WHERE p.quiz_id = %s AND p.id <= %s
+        ORDER BY r.participant_id, r.question_id
+    """, (quiz_id, max_id))
+    responses = cursor.fetchall()
+    if not responses:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+        return None
+
+    name = archive.archive_name(quiz_id, datetime.now())
+    archive.write_archive(ARCHIVE_DIR, name, {'responses': responses})
+
+    # The summary rows now count every response, keep that part once the raw rows are gone
+    cursor.execute(
+        "UPDATE participant_scores SET archived_answered = answered_questions, archived_correct = correct_answers "
+        "WHERE quiz_id = %s AND participant_id <= %s",
+        (quiz_id, max_id)
+    )
+    cursor.execute(
+        "DELETE FROM responses WHERE participant_id IN (SELECT id FROM participants WHERE quiz_id = %s AND id <= %s)",
+        (quiz_id, max_id)
+    )
+    if cursor.rowcount != len(responses):
+        # A concurrent run moved them already, or new answers arrived in between;
+        # the file name is unique to this run, so only its own file is removed
+        conn.rollback()
+        cursor.close()
+        conn.close()
+        archive.remove_archive(ARCHIVE_DIR, name)
+        return None
+    participants = len({response['participant_id'] for response in responses})
+    cursor.execute(
+        "INSERT INTO response_archives (quiz_id, archive_path, participants, responses) VALUES (%s, %s, %s, %s)",
+        (quiz_id, name, participants, len(responses))
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return participants, len(responses)
+
+def archive_idle_quizzes(idle_days=ARCHIVE_AFTER_DAYS, batch_size=100):
+    """Archive every quiz idle for idle_days
+
+    Idleness is judged from the database alone, since the CLI process that
+    runs this holds no live sessions. archive_quiz backs out when answers
+    arrive while a quiz is being archived.
+    """
+    cutoff = datetime.now() - timedelta(days=idle_days)
+    totals = [0, 0, 0]
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    quiz_ids = find_archivable_quizzes(cursor, cutoff, batch_size)
+    while quiz_ids:
+        for quiz_id in quiz_ids:
+            archived = archive_quiz(quiz_id)
+            if archived:
+                totals[0] += 1
+                totals[1] += archived[0]
+                totals[2] += archived[1]
+        if len(quiz_ids) < batch_size:
+            break
+        # Quizzes that could not be archived above are still listed, look past them
+        quiz_ids = find_archivable_quizzes(cursor, cutoff, batch_size, after_quiz_id=quiz_ids[-1])
+
+    cursor.close()
+    conn.close()
+    return tuple(totals)
+
+@app.cli.command('host-key')
+@click.argument('quiz_id', type=int)
+def host_key_command(quiz_id):
+    """Print the host key of a quiz, e.g. one created before host keys existed"""
+    print(issue_host_key(quiz_id))
+
+@app.cli.command('archive-quizzes')
+def archive_quizzes_command():
+    """Move the responses of idle quizzes to cold storage"""
+    quizzes, participants, responses = archive_idle_quizzes()
+    print(f"Archived {responses} responses of {participants} participants from {quizzes} quizzes into {ARCHIVE_DIR}")
+
+def load_archived_answers(cursor, quiz_id):
+    """Answers of a quiz moved to cold storage, as {participant_id: {question_id: answer_id}}"""
+    cursor.execute("SELECT archive_path FROM response_archives WHERE quiz_id = %s ORDER BY id", (quiz_id,))
+    selected = {}
+    for row in cursor.fetchall():
+        try:
+            tables = archive.read_archive(os.path.join(ARCHIVE_DIR, row['archive_path']))
+        except (OSError, ValueError, KeyError) as err:
+            # Only per-question answers are lost, scores stay in participant_scores
+            print(f"Archive {row['archive_path']} of quiz {quiz_id} is unreadable: {err}")
+            continue
+        for response in tables['responses']:
+            selected.setdefault(response['participant_id'], {})[response['question_id']] = response['answer_id']
+    return selected
+
+# Pages that take no server data, pre-rendered by `flask build-assets`
+PRERENDERED_PAGES = (
+    'myquiz_index.html', 'create_quiz.html', 'join_quiz.html', 'host.html',
+    'participant.html', 'take_quiz.html', 'browse_quizzes.html'
+)
+
+# Fingerprinted asset paths and pre-rendered pages from the last asset build
+asset_manifest = asset_pipeline.load_manifest()
+prerendered_pages = {
+    page for page in PRERENDERED_PAGES
+    if os.path.exists(os.path.join(asset_pipeline.PAGES_DIR, page))
+}
+
+def asset_url(path):
+    """URL of a static asset, fingerprinted when the assets have been built"""
+    built_path = asset_manifest.get(path)
+    if built_path:
+        return url_for('serve_asset', filename=built_path)
+    return url_for('static', filename=path)
+
+@app.context_processor
+def inject_asset_url():
+    return {'asset_url': asset_url}
+
+def render_page(template):
+    """Serve a page that takes no server data, using its pre-rendered copy when built"""
+    if template in prerendered_pages:
+        response = send_from_directory(asset_pipeline.PAGES_DIR, template)
+        # Pages point at fingerprinted assets, so revalidate them on every visit
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return render_template(template)
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify and fingerprint static assets and pre-render static pages"""
+    asset_manifest.clear()
+    asset_manifest.update(asset_pipeline.build_assets())
+
+    os.makedirs(asset_pipeline.PAGES_DIR, exist_ok=True)
+    with app.test_request_context():
+        for page in PRERENDERED_PAGES:
+            with open(os.path.join(asset_pipeline.PAGES_DIR, page), 'w') as f:
+                f.write(render_template(page))
+    prerendered_pages.update(PRERENDERED_PAGES)
+    print(f"Built {len(asset_manifest)} assets and {len(PRERENDERED_PAGES)} pages into {asset_pipeline.DIST_DIR}")
+
+# Route to serve built assets, fingerprinted so they can be cached forever
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    mimetype = mimetypes.guess_type(filename)[0]
+    if request.accept_encodings['gzip'] > 0 and os.path.exists(os.path.join(asset_pipeline.DIST_DIR, filename + '.gz')):
+        response = send_from_directory(asset_pipeline.DIST_DIR, filename + '.gz', mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = send_from_directory(asset_pipeline.DIST_DIR, filename, mimetype=mimetype)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+# Requests carrying this key in X-Profile-Key are profiled, and it unlocks /admin/slow_requests
+PROFILE_KEY = os.environ.get('QUIZ_PROFILE_KEY')
+# Share of all requests profiled at random, e.g. 0.01 for one in a hundred
+PROFILE_SAMPLE_RATE = float(os.environ.get('QUIZ_PROFILE_SAMPLE_RATE', 0))
+PROFILING_ENABLED = bool(PROFILE_KEY) or PROFILE_SAMPLE_RATE > 0
+
+request_profiler = SamplingProfiler(
+    interval=float(os.environ.get('QUIZ_PROFILE_INTERVAL_MS', 5)) / 1000,
+    output_dir=os.environ.get('QUIZ_PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')),
+    window=int(os.environ.get('QUIZ_PROFILE_WINDOW', 300)),
+    max_file_bytes=int(os.environ.get('QUIZ_PROFILE_MAX_MB', 64)) * 1024 * 1024
+)
+
+def has_profile_key():
+    """Check the X-Profile-Key header against QUIZ_PROFILE_KEY"""
+    key = request.headers.get('X-Profile-Key')
+    return bool(PROFILE_KEY and key) and hmac.compare_digest(key, PROFILE_KEY)
+
+@app.before_request
+def start_request_profile():
+    # Registered before the other hooks, so profiles cover them too
+    if not PROFILING_ENABLED:
+        return None
+    g.request_started = time.perf_counter()
+    if has_profile_key() or random.random() < PROFILE_SAMPLE_RATE:
+        g.profiled_thread = threading.get_ident()
+        request_profiler.start(g.profiled_thread)
+    return None
+
+def finish_request_profile(status):
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    profiled_thread = g.pop('profiled_thread', None)
+    samples = request_profiler.stop(profiled_thread) if profiled_thread is not None else None
+    request_profiler.record({
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'status': status,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+        'started_at': datetime.now().isoformat(timespec='seconds')
+    }, samples)
+
+@app.after_request
+def record_request_profile(response):
+    finish_request_profile(response.status_code)
+    return response
+
+@app.teardown_request
+def record_failed_request_profile(error=None):
+    # after_request hooks are skipped when a view raises
+    finish_request_profile(500)
+
+# Route for operators to find the slowest recent requests and where their time went
+@app.route('/admin/slow_requests')
+def slow_requests():
+    if not has_profile_key():
+        return jsonify({'error': 'Not found'}), 404
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    return json_response({
+        'profile_dir': request_profiler.output_dir,
+        'window_seconds': request_profiler.window,
+        'requests': request_profiler.slowest(limit)
+    })
+
+# Endpoints that must answer even when the database is not ready
+SCHEMA_EXEMPT_ENDPOINTS = {'healthz', 'readyz', 'static', 'serve_asset', 'slow_requests'}
+
+@app.before_request
+def verify_schema():
+    # Workers start serving immediately, the schema is verified by the first request
+    if request.endpoint in SCHEMA_EXEMPT_ENDPOINTS or schema_ready:
+        return None
+    if not ensure_schema():
+        return jsonify({'error': 'Database is not available'}), 503
+    return None
+
+def create_app(config=None):
+    """Entry point for WSGI servers, e.g. gunicorn 'app:create_app()'
+
+    A thin wrapper, not a real factory: it applies config to the single
+    module-level app and returns it, so every call shares the same app and
+    in-memory state. Startup does no database work: the schema is verified
+    and the connection pool is opened by the first request.
+    """
+    if config:
+        app.config.update(config)
+    return app
+
+# Route for liveness probes, answers as long as the process is serving
+@app.route('/healthz')
+def healthz():
+    return jsonify({'status': 'ok'})
+
+# Route for readiness probes, checks the schema and a pooled connection
+@app.route('/readyz')
+def readyz():
+    if not ensure_schema():
+        return jsonify({'status': 'unavailable', 'schema': False}), 503
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+        conn.close()
+    except DATABASE_ERRORS as err:
+        return jsonify({'status': 'unavailable', 'schema': True, 'error': str(err)}), 503
+    return jsonify({'status': 'ready', 'schema_version': SCHEMA_VERSION, 'database': db_router.status()})
+
 # Route to serve the main page (MyQuiz-like interface)
 @app.route('/')
 def index():
-    return render_template('myquiz_index.html')
+    return render_page('myquiz_index.html')
 
 # Route to create a new quiz
 @app.route('/create_quiz', methods=['GET', 'POST'])
@@ -197,22 +1335,33 @@ def create_quiz():
                         (question_id, answer_text, image_url, is_correct)
                     )
             
+            # Store the first version of the quiz
+            version_cursor = conn.cursor(dictionary=True)
+            snapshot_quiz_version(version_cursor, {'id': quiz_id, 'title': title, 'description': description})
+            version_cursor.close()
+            
             conn.commit()
             cursor.close()
             conn.close()
             
-            return jsonify({'success': True, 'quiz_id': quiz_id, 'session_code': session_code})
-        except mysql.connector.Error as err:
+            return jsonify({
+                'success': True,
+                'quiz_id': quiz_id,
+                'session_code': session_code,
+                # Only the creator gets this, it is what opens a lobby with host rights
+                'host_key': issue_host_key(quiz_id)
+            })
+        except DATABASE_ERRORS as err:
             print(f"Database error: {err}")
             return jsonify({'success': False, 'error': str(err)}), 500
     
-    return render_template('create_quiz.html')
+    return render_page('create_quiz.html')
 
 # Route to get all quizzes
 @app.route('/quizzes')
 def get_quizzes():
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute("SELECT id, title, description, created_at FROM quizzes")
@@ -222,7 +1371,7 @@ def get_quizzes():
         conn.close()
         
         return jsonify(quizzes)
-    except mysql.connector.Error as err:
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return jsonify({'error': str(err)}), 500
 
@@ -233,6 +1382,18 @@ def delete_quiz(quiz_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
+        # Refuse to pull the quiz out from under a room that is playing it or has players waiting
+        cursor.execute("SELECT session_code FROM quizzes WHERE id = %s", (quiz_id,))
+        result = cursor.fetchone()
+        session = active_sessions.get(result[0]) if result else None
+        if session and (session['status'] == 'active' or (session['status'] == 'waiting' and session['player_count'])):
+            cursor.close()
+            conn.close()
+            return jsonify({'success': False, 'error': 'Quiz has a live session in progress'}), 409
+        
+        cursor.execute("SELECT archive_path FROM response_archives WHERE quiz_id = %s", (quiz_id,))
+        archive_paths = [row[0] for row in cursor.fetchall()]
+        
         # Delete the quiz (and related questions, answers, participants, responses due to CASCADE)
         cursor.execute("DELETE FROM quizzes WHERE id = %s", (quiz_id,))
         conn.commit()
@@ -240,8 +1401,11 @@ def delete_quiz(quiz_id):
         cursor.close()
         conn.close()
         
+        for archive_path in archive_paths:
+            archive.remove_archive(ARCHIVE_DIR, archive_path)
+        
         return jsonify({'success': True})
-    except mysql.connector.Error as err:
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return jsonify({'success': False, 'error': str(err)}), 500
 
@@ -249,7 +1413,7 @@ def delete_quiz(quiz_id):
 @app.route('/api/quiz/<int:quiz_id>')
 def get_quiz(quiz_id):
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor(dictionary=True)
         
         # Get quiz details
@@ -261,53 +1425,26 @@ def get_quiz(quiz_id):
             conn.close()
             return jsonify({'error': 'Quiz not found'}), 404
         
-        # Get questions and answers for the quiz
-        cursor.execute("""
-            SELECT q.id, q.question_text, q.question_number,
-                   a.id as answer_id, a.answer_text, a.image_url, a.is_correct
-            FROM questions q
-            LEFT JOIN answers a ON q.id = a.question_id
-            WHERE q.quiz_id = %s
-            ORDER BY q.question_number, q.id, a.id
-        """, (quiz_id,))
-        
-        results = cursor.fetchall()
-        
-        # Organize the data
-        questions = {}
-        for row in results:
-            q_id = row['id']
-            if q_id not in questions:
-                questions[q_id] = {
-                    'id': q_id,
-                    'question_text': row['question_text'],
-                    'question_number': row['question_number'],
-                    'answers': []
-                }
-            
-            if row['answer_id']:
-                questions[q_id]['answers'].append({
-                    'id': row['answer_id'],
-                    'answer_text': row['answer_text'],
-                    'image_url': row['image_url'],
-                    'is_correct': row['is_correct']
-                })
-        
-        quiz['questions'] = list(questions.values())
+        content_hash = latest_quiz_version(cursor, quiz)
         
         cursor.close()
         conn.close()
         
-        return jsonify(quiz)
-    except mysql.connector.Error as err:
+        return serve_quiz_version(content_hash)
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return jsonify({'error': str(err)}), 500
 
 # Route to get quiz by session code
 @app.route('/api/quiz_by_code/<session_code>')
 def get_quiz_by_code(session_code):
+    # Live sessions serve the version they pinned without touching the database
+    session = active_sessions.get(session_code)
+    if session is not None and session.get('content_hash'):
+        return serve_quiz_version(session['content_hash'])
+
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor(dictionary=True)
         
         # Get quiz details by session code
@@ -319,45 +1456,25 @@ def get_quiz_by_code(session_code):
             conn.close()
             return jsonify({'error': 'Quiz not found'}), 404
         
-        # Get questions and answers for the quiz
-        cursor.execute("""
-            SELECT q.id, q.question_text, q.question_number,
-                   a.id as answer_id, a.answer_text, a.image_url, a.is_correct
-            FROM questions q
-            LEFT JOIN answers a ON q.id = a.question_id
-            WHERE q.quiz_id = %s
-            ORDER BY q.question_number, q.id, a.id
-        """, (quiz['id'],))
-        
-        results = cursor.fetchall()
-        
-        # Organize the data
-        questions = {}
-        for row in results:
-            q_id = row['id']
-            if q_id not in questions:
-                questions[q_id] = {
-                    'id': q_id,
-                    'question_text': row['question_text'],
-                    'question_number': row['question_number'],
-                    'answers': []
-                }
-            
-            if row['answer_id']:
-                questions[q_id]['answers'].append({
-                    'id': row['answer_id'],
-                    'answer_text': row['answer_text'],
-                    'image_url': row['image_url'],
-                    'is_correct': row['is_correct']
-                })
-        
-        quiz['questions'] = list(questions.values())
+        content_hash = latest_quiz_version(cursor, quiz)
         
         cursor.close()
         conn.close()
         
-        return jsonify(quiz)
-    except mysql.connector.Error as err:
+        return serve_quiz_version(content_hash)
+    except DATABASE_ERRORS as err:
+        print(f"Database error: {err}")
+        return jsonify({'error': str(err)}), 500
+
+# Route to get an immutable quiz version, cacheable forever by clients and proxies
+@app.route('/api/quiz_version/<content_hash>')
+def get_quiz_version(content_hash):
+    try:
+        response = serve_quiz_version(content_hash)
+        if response.status_code == 200:
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return jsonify({'error': str(err)}), 500
 
@@ -365,7 +1482,7 @@ def get_quiz_by_code(session_code):
 @app.route('/leaderboard/<int:quiz_id>')
 def get_leaderboard(quiz_id):
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor(dictionary=True)
         
         # Get quiz details
@@ -376,16 +1493,14 @@ def get_leaderboard(quiz_id):
             conn.close()
             return jsonify({'error': 'Quiz not found'}), 404
         
-        # Calculate scores for each participant
+        # Read the scores maintained by submit_answer
         cursor.execute("""
             SELECT p.participant_name, 
-                   COUNT(r.id) as total_questions,
-                   SUM(CASE WHEN a.is_correct = 1 THEN 1 ELSE 0 END) as correct_answers
+                   COALESCE(s.answered_questions, 0) as total_questions,
+                   COALESCE(s.correct_answers, 0) as correct_answers
             FROM participants p
-            LEFT JOIN responses r ON p.id = r.participant_id
-            LEFT JOIN answers a ON r.answer_id = a.id
+            LEFT JOIN participant_scores s ON s.participant_id = p.id
             WHERE p.quiz_id = %s
-            GROUP BY p.id, p.participant_name
             ORDER BY correct_answers DESC, total_questions ASC
         """, (quiz_id,))
         
@@ -398,29 +1513,29 @@ def get_leaderboard(quiz_id):
             'quiz_title': quiz['title'],
             'leaderboard': leaderboard
         })
-    except mysql.connector.Error as err:
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return jsonify({'error': str(err)}), 500
 
 # Route to join a quiz session
 @app.route('/join_quiz', methods=['GET'])
 def join_quiz_page():
-    return render_template('join_quiz.html')
+    return render_page('join_quiz.html')
 
 # Route for host to manage the quiz
 @app.route('/host/<session_code>')
 def host_quiz(session_code):
-    return render_template('host.html')
+    return render_page('host.html')
 
 # Route for participants to join the quiz
 @app.route('/quiz/<session_code>')
 def participant_quiz(session_code):
-    return render_template('participant.html')
+    return render_page('participant.html')
 
 # Route to take a quiz (serves the quiz page) - for individual quizzes
 @app.route('/quiz/<int:quiz_id>')
 def take_quiz_page(quiz_id):
-    return render_template('take_quiz.html')
+    return render_page('take_quiz.html')
 
 # Route to view leaderboard
 @app.route('/leaderboard/<int:quiz_id>/view')
@@ -435,7 +1550,7 @@ def start_session(session_code):
         cursor = conn.cursor(dictionary=True)
         
         # Get quiz details by session code
-        cursor.execute("SELECT id, title FROM quizzes WHERE session_code = %s", (session_code,))
+        cursor.execute("SELECT id, title, description FROM quizzes WHERE session_code = %s", (session_code,))
         quiz = cursor.fetchone()
         
         if not quiz:
@@ -443,31 +1558,28 @@ def start_session(session_code):
             conn.close()
             return jsonify({'error': 'Quiz not found'}), 404
         
-        # Get quiz questions to know the total
-        cursor.execute("SELECT COUNT(*) as total_questions FROM questions WHERE quiz_id = %s", (quiz['id'],))
-        total_questions_result = cursor.fetchone()
-        total_questions = total_questions_result['total_questions'] if total_questions_result else 0
-        
-        # Create a session in memory
-        active_sessions[session_code] = {
-            'quiz_id': quiz['id'],
-            'current_question': 0,
-            'status': 'waiting',  # waiting, active, results
-            'participants': [],
-            'responses': {},  # Track responses for each question
-            'total_questions': total_questions
-        }
+        # Drop the timer of a previous run before resetting the session
+        question_timers.cancel(session_code)
+
+        # Create a session in memory, pinned to the current version of the quiz
+        session = new_session(quiz['id'], 0)
+        pin_quiz_version(cursor, quiz, session)
+        conn.commit()
+        active_sessions[session_code] = session
         
         cursor.close()
         conn.close()
         
-        return jsonify({'success': True, 'quiz_id': quiz['id']})
-    except mysql.connector.Error as err:
+        return jsonify({'success': True, 'quiz_id': quiz['id'], 'quiz_version': session['quiz_version']})
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return jsonify({'success': False, 'error': str(err)}), 500
 
 # Route to join a quiz session
 @app.route('/join_session/<session_code>', methods=['POST'])
+@rate_limited(join_session_limiter, lambda: request.view_args['session_code'])
+@rate_limited(join_client_limiter, client_key(lambda: (request.view_args['session_code'], request_json().get('participant_name'))))
+@admission_controlled
 def join_session(session_code):
     try:
         data = request.json
@@ -513,53 +1625,59 @@ def join_session(session_code):
             total_questions_result = cursor.fetchone()
             total_questions = total_questions_result[0] if total_questions_result else 0
 
-            active_sessions[session_code] = {
-                'quiz_id': quiz_id,
-                'current_question': 0,
-                'status': 'waiting',  # waiting, active, results
-                'participants': [],
-                'responses': {},  # Track responses for each question
-                'total_questions': total_questions
-            }
-
-        # Check if participant already exists in the active session to avoid duplicates
-        existing_in_session = False
-        for participant in active_sessions[session_code]['participants']:
-            if participant['name'] == participant_name and participant['is_host'] == is_host:
-                existing_in_session = True
-                participant_id = participant['id']  # Use the existing participant ID
-                break
+            active_sessions.setdefault(session_code, new_session(quiz_id, total_questions))
 
         conn.commit()
         cursor.close()
         conn.close()
 
-        # Only add to session if not already present
-        if not existing_in_session:
-            participant_info = {
-                'id': participant_id,
-                'name': participant_name,
-                'is_host': is_host,
-                'score': 0  # Initialize score
-            }
-            active_sessions[session_code]['participants'].append(participant_info)
+        session = active_sessions[session_code]
+        with active_sessions.lock_for(session_code):
+            # A participant already in the session keeps their existing ID
+            participant_id = add_session_participant(session, participant_id, participant_name, is_host)['id']
 
-        return jsonify({'success': True, 'participant_id': participant_id, 'is_host': is_host})
-    except mysql.connector.Error as err:
+        return jsonify({
+            'success': True,
+            'participant_id': participant_id,
+            'is_host': is_host,
+            'resume_token': issue_resume_token(session_code, participant_id)
+        })
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return jsonify({'success': False, 'error': str(err)}), 500
 
+# Route for a participant to pick up their session after a reload or a dropped connection
+@app.route('/resume_session/<session_code>', methods=['POST'])
+@rate_limited(join_client_limiter, client_key(lambda: request_json().get('resume_token')))
+def resume_session(session_code):
+    # Served from memory alone, so a room reconnecting at once never reaches the database
+    token = request_json().get('resume_token')
+    claims = read_resume_token(token) if isinstance(token, str) else None
+    if claims is None or claims[0] != session_code:
+        return jsonify({'success': False, 'error': 'Invalid or expired resume token'}), 401
+
+    session = active_sessions.get(session_code)
+    participant = session['participants_by_id'].get(claims[1]) if session else None
+    if participant is None:
+        # The session is no longer in memory, e.g. after a restart; join again
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+
+    with active_sessions.lock_for(session_code):
+        progress = participant_progress(session, participant)
+    return json_response(dict(progress, success=True))
+
 # Route to get quiz session status
 @app.route('/session_status/<session_code>')
 def get_session_status(session_code):
+    role = request.args.get('role')
+    if role == 'host' and not is_session_host(session_code):
+        return jsonify({'error': 'Host token required'}), 403
     if session_code in active_sessions:
         session = active_sessions[session_code]
-        # Add participant count to the response
-        session['participant_count'] = len(session['participants'])
-        return jsonify(session)
+        return json_response(session_status_payload(session, role))
     else:
         # If session doesn't exist, check if it's a valid quiz and create the session
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT id, title FROM quizzes WHERE session_code = %s", (session_code,))
         quiz = cursor.fetchone()
@@ -568,7 +1686,7 @@ def get_session_status(session_code):
 
         if quiz:
             # Create the session in memory
-            conn = get_db_connection()
+            conn = get_read_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) as total_questions FROM questions WHERE quiz_id = %s", (quiz['id'],))
             total_questions_result = cursor.fetchone()
@@ -576,41 +1694,89 @@ def get_session_status(session_code):
             cursor.close()
             conn.close()
 
-            active_sessions[session_code] = {
-                'quiz_id': quiz['id'],
-                'current_question': 0,
-                'status': 'waiting',
-                'participants': [],
-                'responses': {},
-                'total_questions': total_questions
-            }
-
-            session = active_sessions[session_code]
-            session['participant_count'] = len(session['participants'])
-            return jsonify(session)
+            session = active_sessions.setdefault(session_code, new_session(quiz['id'], total_questions))
+            return json_response(session_status_payload(session, role))
         else:
             return jsonify({'error': 'Session not found'}), 404
 
-# Route to get participant responses for the host
+# Route to get participant responses for the host, one page at a time
 @app.route('/responses/<session_code>')
+@host_required
 def get_responses(session_code):
     if session_code in active_sessions:
         session = active_sessions[session_code]
-        responses = session.get('responses', {})
         current_question = session.get('current_question', 0)
-        participants = session.get('participants', [])
+        question = request.args.get('question', current_question, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', RESPONSES_PAGE_SIZE, type=int), 1), MAX_RESPONSES_PAGE_SIZE)
+        
+        question_responses = session['responses'].get(str(question), {})
+        start = (page - 1) * per_page
+        page_items = itertools.islice(question_responses.items(), start, start + per_page)
+        
+        # Build the responses on this page with participant names
+        responses = [
+            {
+                'participant_id': participant_id,
+                'participant_name': session['participants_by_id'].get(int(participant_id), {}).get('name', 'Unknown'),
+                'answer_id': response['answer_id'],
+                'timestamp': response['timestamp']
+            }
+            for participant_id, response in page_items
+        ]
         
-        # Get participant names for the responses
         response_data = {
-            'responses': responses,
+            'question': question,
             'current_question': current_question,
-            'participants': participants
+            'page': page,
+            'per_page': per_page,
+            'total': len(question_responses),
+            'participant_count': session['player_count'],
+            'responses': responses
         }
         
-        return jsonify(response_data)
+        return json_response(response_data)
     else:
         return jsonify({'error': 'Session not found'}), 404
 
+# Route to get the answer distribution of a question for the host
+@app.route('/responses/<session_code>/summary')
+@host_required
+def get_responses_summary(session_code):
+    if session_code in active_sessions:
+        session = active_sessions[session_code]
+        current_question = session.get('current_question', 0)
+        question = request.args.get('question', current_question, type=int)
+        
+        return json_response({
+            'question': question,
+            'current_question': current_question,
+            'total_responses': len(session['responses'].get(str(question), {})),
+            'participant_count': session['player_count'],
+            'answer_counts': session['answer_counts'].get(str(question), {})
+        })
+    else:
+        return jsonify({'error': 'Session not found'}), 404
+
+# Route for the routing layer to find the worker a session is pinned to
+@app.route('/session_worker/<session_code>')
+def get_session_worker(session_code):
+    worker = worker_ring.node_for(session_code)
+    if worker is None:
+        return jsonify({'error': 'No worker nodes configured'}), 404
+    response = jsonify({'session_code': session_code, 'worker': worker})
+    response.headers['X-Quiz-Worker'] = worker
+    return response
+
+# Route to get per-shard statistics of the live session registry
+@app.route('/session_registry_stats')
+def get_session_registry_stats():
+    shards = active_sessions.stats()
+    return jsonify({
+        'sessions': sum(shard['sessions'] for shard in shards),
+        'shards': shards
+    })
+
 # Route to start a quiz (for individual quizzes)
 @app.route('/start_quiz/<int:quiz_id>', methods=['POST'])
 def start_quiz(quiz_id):
@@ -633,12 +1799,15 @@ def start_quiz(quiz_id):
         conn.close()
         
         return jsonify({'success': True, 'participant_id': participant_id})
-    except mysql.connector.Error as err:
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return jsonify({'success': False, 'error': str(err)}), 500
 
 # Route to submit an answer
 @app.route('/submit_answer', methods=['POST'])
+@rate_limited(submit_session_limiter, submit_room_key)
+@rate_limited(submit_client_limiter, client_key(lambda: (submit_room_key(), request_json().get('participant_id'))))
+@admission_controlled
 def submit_answer():
     try:
         data = request.json
@@ -646,120 +1815,180 @@ def submit_answer():
         question_id = data.get('question_id')
         answer_id = data.get('answer_id')
         session_code = data.get('session_code')
-        
+        idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+        session = active_sessions.get(session_code) if session_code else None
+        question_index = live_question_index(session, question_id) if session is not None else None
+
+        # Absorb client retries and double clicks without touching the database
+        if session is not None and is_duplicate_submission(session, participant_id, question_index, answer_id, idempotency_key):
+            return jsonify({'success': True, 'duplicate': True})
+
+        # Reject answers while the room is not playing (still waiting, or ended),
+        # after the server-side deadline of a live question, or that name a
+        # question the room has already moved past
+        if session is not None and (session['status'] != 'active' or is_late_answer(session)
+                                    or question_index != session['current_question']):
+            return jsonify({'success': False, 'late': True, 'error': 'Time is up for this question'}), 409
+
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        # Insert the response
+
+        # Store the response, a participant keeps a single row per question
         cursor.execute(
-            "INSERT INTO responses (participant_id, question_id, answer_id) VALUES (%s, %s, %s)",
+            """
+            INSERT INTO responses (participant_id, question_id, answer_id) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE answer_id = VALUES(answer_id), responded_at = CURRENT_TIMESTAMP
+            """,
             (participant_id, question_id, answer_id)
         )
+        refresh_participant_score(cursor, participant_id)
+        cursor.execute("SELECT correct_answers FROM participant_scores WHERE participant_id = %s", (participant_id,))
+        score = cursor.fetchone()
         
         conn.commit()
         cursor.close()
         conn.close()
+        invalidate_results(participant_id)
         
         # Update session responses if it's a live session
-        if session_code and session_code in active_sessions:
-            session = active_sessions[session_code]
-            current_q = session.get('current_question', 0)
-            
-            if str(current_q) not in session['responses']:
-                session['responses'][str(current_q)] = {}
-            
-            session['responses'][str(current_q)][str(participant_id)] = {
-                'answer_id': answer_id,
-                'timestamp': datetime.now().isoformat()
-            }
+        if session is not None:
+            with active_sessions.lock_for(session_code):
+                record_live_response(session, participant_id, question_index, answer_id)
+                # Resumes read the score from memory, keep it equal to the stored one
+                participant = session['participants_by_id'].get(participant_id)
+                if participant is not None and score:
+                    participant['score'] = score[0]
+                if idempotency_key:
+                    session['idempotency_keys'].add(idempotency_key)
         
         return jsonify({'success': True})
-    except mysql.connector.Error as err:
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return jsonify({'success': False, 'error': str(err)}), 500
 
 # Route to get quiz results
 @app.route('/quiz_results/<int:quiz_id>/<int:participant_id>')
 def get_quiz_results(quiz_id, participant_id):
+    cached = get_cached_results(quiz_id, participant_id)
+    if cached is not None:
+        return jsonify(cached)
+
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor(dictionary=True)
         
         # Get participant info
         cursor.execute(
-            "SELECT participant_name FROM participants WHERE id = %s AND quiz_id = %s",
+            "SELECT participant_name, session_code FROM participants WHERE id = %s AND quiz_id = %s",
             (participant_id, quiz_id)
         )
         participant = cursor.fetchone()
         
+        # Results that will be cached are read from the primary
+        if participant and is_quiz_finished(participant['session_code']) and db_router.replica is not None:
+            cursor.close()
+            conn.close()
+            conn = get_results_connection(participant['session_code'])
+            cursor = conn.cursor(dictionary=True)
+        
         if not participant:
             cursor.close()
             conn.close()
             return jsonify({'error': 'Participant not found'}), 404
         
-        # Get all questions and answers for the quiz
-        cursor.execute("""
-            SELECT q.id as question_id, q.question_text, q.question_number,
-                   a.id as answer_id, a.answer_text, a.is_correct,
-                   r.answer_id as selected_answer_id
-            FROM questions q
-            LEFT JOIN answers a ON q.id = a.question_id
-            LEFT JOIN responses r ON r.question_id = q.id AND r.participant_id = %s
-            WHERE q.quiz_id = %s
-            ORDER BY q.question_number, q.id, a.id
-        """, (participant_id, quiz_id))
-        
-        results = cursor.fetchall()
-        
-        # Calculate score
-        correct_answers = 0
-        total_questions = 0
-        for row in results:
-            if row['selected_answer_id'] and row['is_correct']:
-                correct_answers += 1
-            if row['answer_id']:  # Count each question once
-                total_questions += 1
-        
-        # Organize the data
-        questions = {}
-        for row in results:
-            q_id = row['question_id']
-            if q_id not in questions:
-                questions[q_id] = {
-                    'id': q_id,
-                    'question_text': row['question_text'],
-                    'question_number': row['question_number'],
-                    'answers': [],
-                    'selected_answer_id': row['selected_answer_id'],
-                    'is_correct': False
-                }
-            
-            if row['answer_id']:
-                answer_info = {
-                    'id': row['answer_id'],
-                    'answer_text': row['answer_text'],
-                    'is_correct': row['is_correct']
-                }
-                questions[q_id]['answers'].append(answer_info)
-                
-                # Check if this is the selected answer and if it's correct
-                if row['selected_answer_id'] == row['answer_id'] and row['is_correct']:
-                    questions[q_id]['is_correct'] = True
-        
-        quiz_results = {
-            'participant_name': participant['participant_name'],
-            'questions': list(questions.values()),
-            'total_questions': total_questions,
-            'correct_answers': correct_answers,
-            'score': f"{correct_answers}/{total_questions}",
-            'percentage': total_questions > 0 and round((correct_answers / total_questions) * 100, 1) or 0
-        }
+        question_rows = fetch_question_rows(cursor, quiz_id)
+        
+        # Get the participant's answers, those of idle quizzes are in cold storage
+        selected = load_archived_answers(cursor, quiz_id).get(participant_id, {})
+        cursor.execute("SELECT question_id, answer_id FROM responses WHERE participant_id = %s", (participant_id,))
+        selected.update({row['question_id']: row['answer_id'] for row in cursor.fetchall()})
         
         cursor.close()
         conn.close()
         
+        quiz_results = assemble_quiz_results(participant['participant_name'], question_rows, selected)
+        if is_quiz_finished(participant['session_code']):
+            cache_results(quiz_id, participant_id, quiz_results)
+        
         return jsonify(quiz_results)
-    except mysql.connector.Error as err:
+    except DATABASE_ERRORS as err:
+        print(f"Database error: {err}")
+        return jsonify({'error': str(err)}), 500
+
+# Route to get the results of many participants at once (host end-of-quiz screen)
+@app.route('/quiz_results/<int:quiz_id>')
+def get_batch_quiz_results(quiz_id):
+    participant_ids = request.args.get('participant_ids')
+    session_code = request.args.get('session_code')
+    
+    try:
+        conn = get_results_connection(session_code)
+        # Replica reads are served but never cached as final
+        read_from_primary = is_quiz_finished(session_code) or db_router.replica is None
+        cursor = conn.cursor(dictionary=True)
+        
+        # Get the requested participants, or every player of the session or quiz
+        if participant_ids:
+            ids = [int(pid) for pid in participant_ids.split(',') if pid.strip().isdigit()][:MAX_BATCH_RESULTS]
+            if not ids:
+                cursor.close()
+                conn.close()
+                return jsonify({'error': 'No valid participant ids'}), 400
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(
+                f"SELECT id, participant_name, session_code FROM participants WHERE quiz_id = %s AND id IN ({placeholders})",
+                (quiz_id, *ids)
+            )
+        elif session_code:
+            cursor.execute(
+                "SELECT id, participant_name, session_code FROM participants WHERE quiz_id = %s AND session_code = %s AND is_host = FALSE ORDER BY id LIMIT %s",
+                (quiz_id, session_code, MAX_BATCH_RESULTS)
+            )
+        else:
+            cursor.execute(
+                "SELECT id, participant_name, session_code FROM participants WHERE quiz_id = %s AND is_host = FALSE ORDER BY id LIMIT %s",
+                (quiz_id, MAX_BATCH_RESULTS)
+            )
+        participants = cursor.fetchall()
+        
+        # Only build the results that are not cached yet
+        results = {}
+        missing = []
+        for participant in participants:
+            cached = get_cached_results(quiz_id, participant['id'])
+            if cached is not None:
+                results[participant['id']] = cached
+            else:
+                missing.append(participant)
+        
+        if missing:
+            question_rows = fetch_question_rows(cursor, quiz_id)
+            
+            # Get the answers of all missing participants in one query, plus those in cold storage
+            archived = load_archived_answers(cursor, quiz_id)
+            selected = {participant['id']: archived.get(participant['id'], {}) for participant in missing}
+            placeholders = ', '.join(['%s'] * len(missing))
+            cursor.execute(
+                f"SELECT participant_id, question_id, answer_id FROM responses WHERE participant_id IN ({placeholders})",
+                tuple(selected)
+            )
+            for row in cursor.fetchall():
+                selected[row['participant_id']][row['question_id']] = row['answer_id']
+            
+            for participant in missing:
+                quiz_results = assemble_quiz_results(participant['participant_name'], question_rows, selected[participant['id']])
+                if read_from_primary and is_quiz_finished(participant['session_code']):
+                    cache_results(quiz_id, participant['id'], quiz_results)
+                results[participant['id']] = quiz_results
+        
+        cursor.close()
+        conn.close()
+        
+        return jsonify({
+            'quiz_id': quiz_id,
+            'results': [dict(results[participant['id']], participant_id=participant['id']) for participant in participants]
+        })
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return jsonify({'error': str(err)}), 500
 
@@ -768,18 +1997,8 @@ def get_quiz_results(quiz_id, participant_id):
 def next_question(session_code):
     if session_code in active_sessions:
         session = active_sessions[session_code]
-        total_questions = session.get('total_questions', 0)
-        
-        # Check if we're at the last question
-        if session['current_question'] >= total_questions - 1:
-            # End the quiz if it's the last question
-            session['status'] = 'results'
-            return jsonify({'success': True, 'status': 'quiz_ended', 'current_question': session['current_question']})
-        else:
-            # Move to next question
-            session['current_question'] += 1
-            session['status'] = 'active'  # Set to active when moving to next question
-            return jsonify({'success': True, 'status': 'next_question', 'current_question': session['current_question']})
+        status = advance_session(session_code, session)
+        return jsonify({'success': True, 'status': status, 'current_question': session['current_question']})
     else:
         return jsonify({'error': 'Session not found'}), 404
 
@@ -787,8 +2006,27 @@ def next_question(session_code):
 @app.route('/start_quiz_now/<session_code>', methods=['POST'])
 def start_quiz_now(session_code):
     if session_code in active_sessions:
-        active_sessions[session_code]['status'] = 'active'
-        return jsonify({'success': True})
+        session = active_sessions[session_code]
+
+        # Sessions opened from the lobby are pinned when the quiz begins
+        if not session.get('content_hash'):
+            try:
+                conn = get_db_connection()
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("SELECT id, title, description FROM quizzes WHERE id = %s", (session['quiz_id'],))
+                quiz = cursor.fetchone()
+                if quiz:
+                    pin_quiz_version(cursor, quiz, session)
+                    conn.commit()
+                cursor.close()
+                conn.close()
+            except DATABASE_ERRORS as err:
+                print(f"Database error: {err}")
+                return jsonify({'success': False, 'error': str(err)}), 500
+
+        session['status'] = 'active'
+        start_question_timer(session_code, session)
+        return jsonify({'success': True, 'question_deadline': session['question_deadline']})
     else:
         return jsonify({'error': 'Session not found'}), 404
 
@@ -796,7 +2034,9 @@ def start_quiz_now(session_code):
 @app.route('/end_quiz/<session_code>', methods=['POST'])
 def end_quiz(session_code):
     if session_code in active_sessions:
-        active_sessions[session_code]['status'] = 'results'
+        session = active_sessions[session_code]
+        session['status'] = 'results'
+        stop_question_timer(session_code, session)
         return jsonify({'success': True})
     else:
         return jsonify({'error': 'Session not found'}), 404
@@ -827,23 +2067,25 @@ def live_quiz_lobby(session_code):
         cursor.close()
         conn.close()
         
-        active_sessions[session_code] = {
-            'quiz_id': quiz['id'],
-            'current_question': 0,
-            'status': 'waiting',  # waiting, active, results
-            'participants': [],
-            'responses': {},  # Track responses for each question
-            'total_questions': total_questions
-        }
+        active_sessions.setdefault(session_code, new_session(quiz['id'], total_questions))
     
     return render_template('lobby.html', session_code=session_code)
 
-# Route to get lobby participants
+# Route to get lobby participants for the host, one page at a time
 @app.route('/lobby_participants/<session_code>')
+@host_required
 def get_lobby_participants(session_code):
     if session_code in active_sessions:
         participants = active_sessions[session_code]['participants']
-        return jsonify({'participants': participants})
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', RESPONSES_PAGE_SIZE, type=int), 1), MAX_RESPONSES_PAGE_SIZE)
+        start = (page - 1) * per_page
+        return json_response({
+            'page': page,
+            'per_page': per_page,
+            'total': len(participants),
+            'participants': participants[start:start + per_page]
+        })
     else:
         return jsonify({'error': 'Session not found'}), 404
 
@@ -858,7 +2100,7 @@ def live_quiz_results(session_code):
     
     # Get results from database
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor(dictionary=True)
         
         # Get quiz details
@@ -869,16 +2111,14 @@ def live_quiz_results(session_code):
             conn.close()
             return "Quiz not found", 404
         
-        # Calculate scores for each participant
+        # Read the scores maintained by submit_answer
         cursor.execute("""
             SELECT p.participant_name, 
-                   COUNT(r.id) as total_questions,
-                   SUM(CASE WHEN a.is_correct = 1 THEN 1 ELSE 0 END) as correct_answers
+                   COALESCE(s.answered_questions, 0) as total_questions,
+                   COALESCE(s.correct_answers, 0) as correct_answers
             FROM participants p
-            LEFT JOIN responses r ON p.id = r.participant_id
-            LEFT JOIN answers a ON r.answer_id = a.id
+            LEFT JOIN participant_scores s ON s.participant_id = p.id
             WHERE p.session_code = %s
-            GROUP BY p.id, p.participant_name
             ORDER BY correct_answers DESC, total_questions ASC
         """, (session_code,))
         
@@ -891,14 +2131,14 @@ def live_quiz_results(session_code):
                                session_code=session_code, 
                                quiz_title=quiz['title'], 
                                leaderboard=leaderboard)
-    except mysql.connector.Error as err:
+    except DATABASE_ERRORS as err:
         print(f"Database error: {err}")
         return "Database error", 500
 
 # Route to view all quizzes page
 @app.route('/browse_quizzes')
 def browse_quizzes():
-    return render_template('browse_quizzes.html')
+    return render_page('browse_quizzes.html')
 
 # Route to create a live quiz lobby (create a new session)
 @app.route('/create_lobby', methods=['POST'])
@@ -907,6 +2147,10 @@ def create_lobby():
         data = request.json
         quiz_id = data.get('quiz_id')
         
+        # Quiz ids are public, host rights need the key create_quiz returned
+        if not is_quiz_creator(quiz_id, data.get('host_key')):
+            return jsonify({'error': 'Host key required'}), 403
+        
         # Get quiz details
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
@@ -931,16 +2175,9 @@ def create_lobby():
         
         # Initialize the session in memory
         if session_code not in active_sessions:
-            active_sessions[session_code] = {
-                'quiz_id': quiz_id,
-                'current_question': 0,
-                'status': 'waiting',  # waiting, active, results
-                'participants': [],
-                'responses': {},  # Track responses for each question
-                'total_questions': total_questions
-            }
+            active_sessions.setdefault(session_code, new_session(quiz_id, total_questions))
         
-        return jsonify({'success': True, 'session_code': session_code})
+        return jsonify({'success': True, 'session_code': session_code, 'host_token': issue_host_token(session_code)})
     except Exception as err:
         print(f"Error creating lobby: {err}")
         return jsonify({'error': str(err)}), 500
@@ -972,14 +2209,7 @@ def start_lobby(quiz_id):
     
     # Initialize the session in memory
     if session_code not in active_sessions:
-        active_sessions[session_code] = {
-            'quiz_id': quiz_id,
-            'current_question': 0,
-            'status': 'waiting',  # waiting, active, results
-            'participants': [],
-            'responses': {},  # Track responses for each question
-            'total_questions': total_questions
-        }
+        active_sessions.setdefault(session_code, new_session(quiz_id, total_questions))
     
     # Redirect to the lobby page
     return render_template('lobby.html', session_code=session_code)
@@ -999,14 +2229,15 @@ def generate_qr_code(session_code):
 # Route to get session status (for participant monitoring)
 @app.route('/get_session_status/<session_code>')
 def get_session_status_detailed(session_code):
+    role = request.args.get('role')
+    if role == 'host' and not is_session_host(session_code):
+        return jsonify({'error': 'Host token required'}), 403
     if session_code in active_sessions:
         session = active_sessions[session_code]
-        # Add participant count to the response
-        session['participant_count'] = len(session['participants'])
-        return jsonify(session)
+        return json_response(session_status_payload(session, role))
     else:
         # If session doesn't exist, check if it's a valid quiz
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT id, title FROM quizzes WHERE session_code = %s", (session_code,))
         quiz = cursor.fetchone()
@@ -1015,7 +2246,7 @@ def get_session_status_detailed(session_code):
         
         if quiz:
             # Create the session in memory
-            conn = get_db_connection()
+            conn = get_read_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) as total_questions FROM questions WHERE quiz_id = %s", (quiz['id'],))
             total_questions_result = cursor.fetchone()
@@ -1023,37 +2254,29 @@ def get_session_status_detailed(session_code):
             cursor.close()
             conn.close()
             
-            active_sessions[session_code] = {
-                'quiz_id': quiz['id'],
-                'current_question': 0,
-                'status': 'waiting',
-                'participants': [],
-                'responses': {},
-                'total_questions': total_questions
-            }
-            
-            session = active_sessions[session_code]
-            session['participant_count'] = len(session['participants'])
-            return jsonify(session)
+            session = active_sessions.setdefault(session_code, new_session(quiz['id'], total_questions))
+            return json_response(session_status_payload(session, role))
         else:
             return jsonify({'error': 'Session not found'}), 404
 
 if __name__ == '__main__':
     print("Starting the application...")
-    print("Make sure MySQL server is running before starting the application.")
-    print("If MySQL is not installed, please install it first:")
-    print("1. Download MySQL from https://dev.mysql.com/downloads/mysql/")
-    print("2. Install and start the MySQL server")
-    print("3. Update the DB_CONFIG in db_config.py with your MySQL credentials")
-    print("4. Run: python app.py")
+    if STORAGE_BACKEND == 'sqlite':
+        print(f"Using the embedded SQLite database at {SQLITE_PATH}")
+    else:
+        print("Make sure MySQL server is running before starting the application.")
+        print("If MySQL is not installed, please install it first:")
+        print("1. Download MySQL from https://dev.mysql.com/downloads/mysql/")
+        print("2. Install and start the MySQL server")
+        print("3. Update the DB_CONFIG in db_config.py with your MySQL credentials")
+        print("4. Run: python app.py")
+        print("   or set QUIZ_STORAGE=sqlite to run without a MySQL server")
     print("\nThe application will be available at http://localhost:5000")
     
-    # Initialize database
-    if init_db():
-        # Check and add required columns if needed
-        check_and_add_columns()
+    # Initialize database, or just verify it when the schema is current
+    if ensure_schema():
         print("\nStarting the application...")
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        create_app().run(debug=True, host='0.0.0.0', port=5000)
     else:
-        print("\nFailed to initialize database. Please check your MySQL connection.")
-        print("You can also use an alternative database like SQLite by modifying the code.")
\ No newline at end of file
+        print("\nFailed to initialize database. Please check your database connection.")
+        print("You can also run on an embedded SQLite database with QUIZ_STORAGE=sqlite.")
\ No newline at end of file
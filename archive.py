@@ -0,0 +1,76 @@
+# Cold storage of archived participants and responses as compressed column files
+import functools
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive')
+
+
+def archive_name(quiz_id, archived_at):
+    """Path of a new archive relative to the archive directory, partitioned by month
+
+    A random suffix keeps names unique when runs on several nodes archive
+    the same quiz within the same second.
+    """
+    return f"{archived_at:%Y}/{archived_at:%m}/quiz_{quiz_id}_{archived_at:%Y%m%d%H%M%S}_{uuid.uuid4().hex[:12]}.json.gz"
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def to_columns(rows):
+    """Turn a list of row dicts into one list of values per column
+
+    Values of a column sit next to each other, which gzip compresses far
+    better than repeating every key in every row.
+    """
+    if not rows:
+        return {}
+    return {column: [_plain(row[column]) for row in rows] for column in rows[0]}
+
+
+def from_columns(columns):
+    """Turn columns written by to_columns back into row dicts"""
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def write_archive(archive_dir, name, tables):
+    """Write {table: rows} to archive_dir/name, atomically, and return the size in bytes"""
+    path = os.path.join(archive_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = json.dumps(
+        {'tables': {table: to_columns(rows) for table, rows in tables.items()}},
+        separators=(',', ':')
+    ).encode('utf-8')
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(gzip.compress(payload, compresslevel=9, mtime=0))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+
+@functools.lru_cache(maxsize=64)
+def read_archive(path):
+    """Load {table: rows} from an archive file; archives never change once written"""
+    with gzip.open(path, 'rb') as f:
+        payload = json.loads(f.read())
+    return {table: from_columns(columns) for table, columns in payload['tables'].items()}
+
+
+def remove_archive(archive_dir, name):
+    path = os.path.join(archive_dir, name)
+    read_archive.cache_clear()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,98 @@
+# Build step that minifies and fingerprints static assets
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+PAGES_DIR = os.path.join(DIST_DIR, 'pages')
+
+# Source directories inside static/ that get built
+ASSET_DIRS = ('css', 'js')
+
+
+def minify_css(source):
+    """Strip comments and collapse whitespace in a stylesheet"""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};:,>])\s*', r'\1', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """Strip indentation, blank lines and whole-line comments from a script
+
+    Line breaks are kept so automatic semicolon insertion and template
+    literals behave exactly as in the source.
+    """
+    lines = []
+    for line in source.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+def fingerprinted_name(path, content):
+    """Insert the first 10 hex digits of the content hash before the extension"""
+    root, ext = os.path.splitext(path)
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    return f"{root}.{digest}{ext}"
+
+
+def build_assets(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Minify, fingerprint and gzip every asset, writing dist/manifest.json
+
+    The manifest maps source paths relative to static/ (e.g. 'js/host.js')
+    to fingerprinted paths relative to dist/.
+    """
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+
+    manifest = {}
+    for asset_dir in ASSET_DIRS:
+        for root, _, files in os.walk(os.path.join(static_dir, asset_dir)):
+            for filename in sorted(files):
+                source_path = os.path.join(root, filename)
+                relative_path = os.path.relpath(source_path, static_dir).replace(os.sep, '/')
+                minify = MINIFIERS.get(os.path.splitext(filename)[1])
+
+                with open(source_path, 'rb') as f:
+                    content = f.read()
+                if minify is not None:
+                    content = minify(content.decode('utf-8')).encode('utf-8')
+
+                output_path = fingerprinted_name(relative_path, content)
+                target = os.path.join(dist_dir, output_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(content)
+                # Precompressed copy, served to clients that accept gzip
+                with open(target + '.gz', 'wb') as f:
+                    f.write(gzip.compress(content, compresslevel=9, mtime=0))
+
+                manifest[relative_path] = output_path
+
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Load the asset manifest, or an empty one when assets were not built"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,20 @@
+# Shared fixtures, the app runs against an embedded SQLite database per test
+import pytest
+
+import app
+from db_router import DatabaseRouter
+from storage import DATABASE_ERRORS, create_sqlite_schema, sqlite_factory
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    router = DatabaseRouter(primary=sqlite_factory(str(tmp_path / 'quiz.db')), errors=DATABASE_ERRORS)
+    conn = router.write_connection()
+    create_sqlite_schema(conn)
+    conn.close()
+    monkeypatch.setattr(app, 'db_router', router)
+    monkeypatch.setattr(app, 'schema_ready', True)
+    for limiter in (app.join_session_limiter, app.join_client_limiter,
+                    app.submit_session_limiter, app.submit_client_limiter):
+        monkeypatch.setattr(limiter, 'buckets', {})
+    return app.app.test_client()
@@ -5,3 +5,7 @@ DB_CONFIG = {
     'password': 'toor123@',  # Change this to your MySQL password
     'database': 'quiz_db'
 }
+
+# Optional read replica for read-only endpoints, same keys as DB_CONFIG.
+# Leave as None to send every query to the primary.
+REPLICA_DB_CONFIG = None
@@ -0,0 +1,127 @@
+# Routing of database connections between the primary and a read replica
+import threading
+import time
+
+import mysql.connector
+import mysql.connector.pooling
+
+
+def mysql_pool_factory(pool_name, config, pool_size):
+    """Connection factory backed by a pool that is opened on first use
+
+    Closing a connection returns it to the pool. When every pooled
+    connection is busy a direct connection is opened instead of failing.
+    """
+    state = {'pool': None}
+    lock = threading.Lock()
+
+    def connect():
+        if state['pool'] is None:
+            with lock:
+                if state['pool'] is None:
+                    state['pool'] = mysql.connector.pooling.MySQLConnectionPool(
+                        pool_name=pool_name,
+                        pool_size=pool_size,
+                        **config
+                    )
+        try:
+            return state['pool'].get_connection()
+        except mysql.connector.errors.PoolError:
+            return mysql.connector.connect(**config)
+
+    return connect
+
+
+def mysql_replica_lag(conn):
+    """Seconds the MySQL replica behind conn lags its source, or None if replication is broken
+
+    A server without replication status (e.g. a standalone stand-in used for
+    local testing) reports no lag.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SHOW REPLICA STATUS")
+    except mysql.connector.Error:
+        # Servers older than 8.0.22
+        cursor.execute("SHOW SLAVE STATUS")
+    status = cursor.fetchone()
+    cursor.close()
+
+    if not status:
+        return 0
+    if 'Seconds_Behind_Source' in status:
+        return status['Seconds_Behind_Source']
+    return status.get('Seconds_Behind_Master')
+
+
+class DatabaseRouter:
+    """Hand out primary connections for writes and replica connections for reads
+
+    Reads fall back to the primary when no replica is configured, when the
+    caller needs to see its own recent writes, when the replica cannot be
+    reached, or when its replication lag exceeds max_lag_seconds. The lag is
+    probed at most once per lag_check_interval seconds.
+    """
+
+    def __init__(self, primary, replica=None, lag_probe=None, max_lag_seconds=5,
+                 lag_check_interval=5, errors=(Exception,)):
+        self.primary = primary
+        self.replica = replica
+        self.lag_probe = lag_probe
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval = lag_check_interval
+        self.errors = errors
+        self.replica_ok = replica is not None
+        self.replica_lag = 0
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def write_connection(self):
+        return self.primary()
+
+    def read_connection(self, prefer_primary=False):
+        """Connection for read-only queries"""
+        if prefer_primary or not self.replica_healthy():
+            return self.primary()
+        try:
+            return self.replica()
+        except self.errors as err:
+            print(f"Replica unavailable, reading from primary: {err}")
+            self.replica_ok = False
+            return self.primary()
+
+    def replica_healthy(self):
+        """Whether reads may go to the replica, re-probing its lag when due"""
+        if self.replica is None:
+            return False
+        now = time.monotonic()
+        if self.checked_at is None or now - self.checked_at >= self.lag_check_interval:
+            # Only one request probes, the others use the last known state
+            if self.lock.acquire(blocking=False):
+                try:
+                    self.checked_at = now
+                    self._probe_replica()
+                finally:
+                    self.lock.release()
+        return self.replica_ok
+
+    def _probe_replica(self):
+        try:
+            conn = self.replica()
+            try:
+                lag = self.lag_probe(conn) if self.lag_probe else 0
+            finally:
+                conn.close()
+        except self.errors as err:
+            print(f"Replica health check failed: {err}")
+            self.replica_ok = False
+            return
+        self.replica_lag = lag
+        self.replica_ok = lag is not None and lag <= self.max_lag_seconds
+
+    def status(self):
+        return {
+            'replica_configured': self.replica is not None,
+            'replica_ok': self.replica_ok,
+            'replica_lag': self.replica_lag
+        }
@@ -0,0 +1,154 @@
+# Opt-in sampling profiler for individual requests, with folded flame-graph output
+import heapq
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# Where a sample's time is spent, judged by the innermost matching module on its stack
+CATEGORY_MODULES = (
+    ('database', ('mysql.', 'sqlite3', 'storage', 'db_router')),
+    ('serialization', ('json', 'response_encoding', 'gzip', 'zlib')),
+)
+
+
+def fold_stack(frame):
+    """Render a stack as 'module:function;...' from the outermost frame inward"""
+    names = []
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def stack_category(stack):
+    for name in reversed(stack.split(';')):
+        module = name.split(':', 1)[0]
+        for category, prefixes in CATEGORY_MODULES:
+            if module.startswith(prefixes):
+                return category
+    return 'python'
+
+
+class SamplingProfiler:
+    """Sample the stacks of the threads serving profiled requests
+
+    A single background thread wakes every `interval` seconds while at
+    least one request is being profiled and counts the folded stack of each
+    such thread, so unprofiled requests pay nothing. Finished profiles are
+    summed in memory and the same thread appends them every
+    `flush_interval` seconds to one .folded file per endpoint in output_dir,
+    which flamegraph.pl or speedscope aggregate into a flame graph. A file
+    that reaches max_file_bytes is rotated to .folded.1.
+
+    The slowest `max_slowest` requests of the current and the previous
+    `window` seconds are kept, however many requests are served meanwhile.
+    """
+
+    def __init__(self, interval=0.005, output_dir='profiles', max_slowest=200, window=300,
+                 flush_interval=10, max_file_bytes=64 * 1024 * 1024):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.max_slowest = max_slowest
+        self.window = window
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.active = {}  # thread id -> Counter of folded stacks
+        self.pending = {}  # endpoint -> Counter of folded stacks not yet written
+        self.slowest_now = []  # min-heaps of (duration_ms, seq, entry)
+        self.slowest_before = []
+        self.window_started = time.monotonic()
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.slow_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def start(self, thread_id):
+        with self.lock:
+            self.active[thread_id] = Counter()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+
+    def stop(self, thread_id):
+        """Stop sampling a thread and return its Counter of folded stacks"""
+        with self.lock:
+            samples = self.active.pop(thread_id, Counter())
+            if not self.active:
+                self.wakeup.clear()
+        return samples
+
+    def _run(self):
+        own_id = threading.get_ident()
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            if self.wakeup.wait(timeout=self.flush_interval):
+                time.sleep(self.interval)
+                frames = sys._current_frames()
+                with self.lock:
+                    for thread_id, samples in self.active.items():
+                        frame = frames.get(thread_id)
+                        if frame is not None and thread_id != own_id:
+                            samples[fold_stack(frame)] += 1
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def record(self, request_info, samples=None, top=20):
+        """Remember a finished request if it is among the slowest, queueing its profile for writing"""
+        duration = request_info['duration_ms']
+        now = time.monotonic()
+        with self.slow_lock:
+            if now - self.window_started >= self.window:
+                self.slowest_before = self.slowest_now if now - self.window_started < 2 * self.window else []
+                self.slowest_now = []
+                self.window_started = now
+            is_slow = len(self.slowest_now) < self.max_slowest or duration > self.slowest_now[0][0]
+        if samples:
+            with self.lock:
+                pending = self.pending.setdefault(request_info.get('endpoint') or 'unknown', Counter())
+                pending.update(samples)
+        if not is_slow:
+            return
+
+        entry = dict(request_info, profiled=samples is not None)
+        if samples:
+            categories = Counter()
+            for stack, count in samples.items():
+                categories[stack_category(stack)] += count
+            entry['samples'] = sum(samples.values())
+            entry['categories'] = dict(categories)
+            entry['stacks'] = [{'stack': stack, 'count': count} for stack, count in samples.most_common(top)]
+        item = (duration, next(self.sequence), entry)
+        with self.slow_lock:
+            if len(self.slowest_now) < self.max_slowest:
+                heapq.heappush(self.slowest_now, item)
+            elif duration > self.slowest_now[0][0]:
+                heapq.heapreplace(self.slowest_now, item)
+
+    def flush(self):
+        """Append the profiles summed since the last flush to their endpoints' folded files"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for endpoint, samples in pending.items():
+            self._write_folded(endpoint, samples)
+
+    def _write_folded(self, endpoint, samples):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, re.sub(r'[^\w.-]', '_', endpoint) + '.folded')
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_file_bytes:
+            os.replace(path, path + '.1')
+        lines = ''.join(f"{stack} {count}\n" for stack, count in samples.items())
+        with open(path, 'a') as f:
+            f.write(lines)
+
+    def slowest(self, limit=20):
+        """Slowest requests of the current and the previous window, slowest first"""
+        with self.slow_lock:
+            items = self.slowest_now + self.slowest_before
+        return [entry for _, _, entry in sorted(items, key=lambda item: item[0], reverse=True)[:limit]]
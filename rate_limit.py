@@ -0,0 +1,95 @@
+# Token bucket rate limiting and admission control for bursty endpoints
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucket:
+    """Allow `rate` events per second with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self, now):
+        """Take a token, returning (allowed, seconds until a token is available)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0
+        return False, (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Keep one token bucket per key (session code, client, ...)"""
+
+    def __init__(self, rate, capacity, max_keys=100000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def check(self, key):
+        """Consume a token for key, returning (allowed, retry_after seconds)"""
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self.buckets[key] = TokenBucket(self.rate, self.capacity)
+            return bucket.try_acquire(now)
+
+    def _prune(self, now):
+        # Buckets idle long enough to have refilled carry no state worth keeping
+        refill_seconds = self.capacity / self.rate
+        idle = [key for key, bucket in self.buckets.items() if now - bucket.updated >= refill_seconds]
+        for key in idle:
+            del self.buckets[key]
+        # Under a flood of distinct keys, drop the oldest half instead of growing
+        if len(self.buckets) >= self.max_keys:
+            oldest = sorted(self.buckets, key=lambda key: self.buckets[key].updated)
+            for key in oldest[:len(oldest) // 2]:
+                del self.buckets[key]
+
+
+class AdmissionGate:
+    """Bound the requests doing database work at once, with a bounded wait queue
+
+    Requests beyond max_concurrent wait up to wait_seconds for a slot, and at
+    most max_queued of them may wait; the rest are turned away immediately so
+    an overload sheds load instead of piling up worker threads.
+    """
+
+    def __init__(self, max_concurrent, max_queued, wait_seconds):
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.max_queued = max_queued
+        self.wait_seconds = wait_seconds
+        self.queued = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def admit(self):
+        """Yield True once admitted, or False when the request must be rejected"""
+        admitted = self.slots.acquire(blocking=False)
+        if not admitted:
+            with self.lock:
+                can_wait = self.queued < self.max_queued
+                if can_wait:
+                    self.queued += 1
+            if can_wait:
+                try:
+                    admitted = self.slots.acquire(timeout=self.wait_seconds)
+                finally:
+                    with self.lock:
+                        self.queued -= 1
+
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.slots.release()
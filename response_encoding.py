@@ -0,0 +1,101 @@
+# Compact JSON encoding and response compression for frequently polled routes
+import gzip
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed, compressing them costs more than it saves
+MIN_COMPRESS_SIZE = 512
+# Fast compression levels, these responses are produced on every poll
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+# Maximum number of immutable payloads kept in the encoded bytes cache
+ENCODED_CACHE_SIZE = 256
+
+_encoded_cache = OrderedDict()
+_encoded_cache_lock = threading.Lock()
+
+
+def encode_json(payload):
+    """Serialize a payload to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def compress(body, encoding):
+    """Compress a body with the given content encoding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def negotiate_encoding(body_size):
+    """Pick the best content encoding the client accepts for a body of this size"""
+    if body_size < MIN_COMPRESS_SIZE:
+        return 'identity'
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br'] > 0:
+        return 'br'
+    if accepted['gzip'] > 0:
+        return 'gzip'
+    return 'identity'
+
+
+def _build_response(body, encoding, status):
+    response = Response(body, status=status, mimetype='application/json')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def json_response(payload, status=200):
+    """Encode a payload compactly and compress it when the client allows it"""
+    body = encode_json(payload)
+    encoding = negotiate_encoding(len(body))
+    return _build_response(compress(body, encoding), encoding, status)
+
+
+def get_cached(cache_key):
+    """Return the cached encodings of an immutable payload, or None"""
+    with _encoded_cache_lock:
+        entry = _encoded_cache.get(cache_key)
+        if entry is not None:
+            _encoded_cache.move_to_end(cache_key)
+        return entry
+
+
+def cache_encoded(cache_key, body):
+    """Store the already encoded JSON bytes of an immutable payload"""
+    entry = {'identity': body}
+    with _encoded_cache_lock:
+        _encoded_cache[cache_key] = entry
+        _encoded_cache.move_to_end(cache_key)
+        while len(_encoded_cache) > ENCODED_CACHE_SIZE:
+            _encoded_cache.popitem(last=False)
+    return entry
+
+
+def serve_cached(entry):
+    """Build a response from a cache entry, compressing each encoding at most once"""
+    encoding = negotiate_encoding(len(entry['identity']))
+    body = entry.get(encoding)
+    if body is None:
+        body = compress(entry['identity'], encoding)
+        entry[encoding] = body
+    return _build_response(body, encoding, 200)
@@ -0,0 +1,136 @@
+# Sharded registry of live quiz sessions
+import bisect
+import hashlib
+import threading
+import zlib
+
+
+class SessionShard:
+    """A slice of the live sessions with its own lock and counters"""
+
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.removed = 0
+
+    def stats(self):
+        return {
+            'sessions': len(self.sessions),
+            'hits': self.hits,
+            'misses': self.misses,
+            'created': self.created,
+            'removed': self.removed
+        }
+
+
+class ShardedSessionRegistry:
+    """Dict-like store of live sessions, split into shards by session code
+
+    Each shard has its own lock, so rooms in different shards never contend.
+    Multi-step updates of one session should hold lock_for(session_code).
+    """
+
+    def __init__(self, shard_count=16):
+        self.shards = [SessionShard() for _ in range(shard_count)]
+
+    def shard_for(self, session_code):
+        # crc32 is stable across processes, unlike hash() on str
+        return self.shards[zlib.crc32(str(session_code).encode('utf-8')) % len(self.shards)]
+
+    def lock_for(self, session_code):
+        """Lock guarding the shard that holds session_code"""
+        return self.shard_for(session_code).lock
+
+    def get(self, session_code, default=None):
+        shard = self.shard_for(session_code)
+        session = shard.sessions.get(session_code)
+        if session is None:
+            shard.misses += 1
+            return default
+        shard.hits += 1
+        return session
+
+    def __contains__(self, session_code):
+        return session_code in self.shard_for(session_code).sessions
+
+    def __getitem__(self, session_code):
+        session = self.get(session_code)
+        if session is None:
+            raise KeyError(session_code)
+        return session
+
+    def __setitem__(self, session_code, session):
+        shard = self.shard_for(session_code)
+        with shard.lock:
+            if session_code not in shard.sessions:
+                shard.created += 1
+            shard.sessions[session_code] = session
+
+    def __delitem__(self, session_code):
+        if self.pop(session_code, None) is None:
+            raise KeyError(session_code)
+
+    def pop(self, session_code, default=None):
+        shard = self.shard_for(session_code)
+        with shard.lock:
+            session = shard.sessions.pop(session_code, None)
+            if session is None:
+                return default
+            shard.removed += 1
+            return session
+
+    def setdefault(self, session_code, session):
+        """Store session unless one already exists, returning the stored one"""
+        shard = self.shard_for(session_code)
+        with shard.lock:
+            if session_code not in shard.sessions:
+                shard.created += 1
+                shard.sessions[session_code] = session
+            return shard.sessions[session_code]
+
+    def __len__(self):
+        return sum(len(shard.sessions) for shard in self.shards)
+
+    def items(self):
+        """Snapshot of (session_code, session) pairs across all shards"""
+        pairs = []
+        for shard in self.shards:
+            with shard.lock:
+                pairs.extend(shard.sessions.items())
+        return pairs
+
+    def __iter__(self):
+        return iter([session_code for session_code, _ in self.items()])
+
+    def stats(self):
+        return [shard.stats() for shard in self.shards]
+
+
+class ConsistentHashRing:
+    """Map session codes onto worker nodes so each room always lands on one worker
+
+    Adding or removing a worker only moves the sessions of the neighbouring
+    ring segments instead of reshuffling every room.
+    """
+
+    def __init__(self, nodes, replicas=100):
+        self.ring = []
+        for node in nodes:
+            for replica in range(replicas):
+                self.ring.append((self._hash(f"{node}#{replica}"), node))
+        self.ring.sort()
+        self.keys = [point for point, _ in self.ring]
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+    def node_for(self, session_code):
+        """Worker node responsible for session_code, or None without nodes"""
+        if not self.ring:
+            return None
+        index = bisect.bisect(self.keys, self._hash(str(session_code))) % len(self.ring)
+        return self.ring[index][1]
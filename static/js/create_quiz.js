@@ -165,6 +165,8 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(response => response.json())
         .then(data => {
             if (data.success) {
+                // The host key is returned only once, it is needed to open lobbies for this quiz
+                localStorage.setItem(`hostKey:${data.quiz_id}`, data.host_key);
                 alert('Quiz created successfully!');
                 window.location.href = '/';
             } else {
@@ -3,6 +3,9 @@ document.addEventListener('DOMContentLoaded', function() {
     const sessionCode = window.location.pathname.split('/').pop();
     document.getElementById('session-code-display').textContent = sessionCode;
     
+    // Set when the quiz list opened the lobby, proves to the server that this page belongs to the host
+    const hostHeaders = { 'X-Host-Token': localStorage.getItem(`hostToken:${sessionCode}`) || '' };
+    
     // Get references to DOM elements
     const waitingRoom = document.getElementById('waiting-room');
     const quizControls = document.getElementById('quiz-controls');
@@ -21,6 +24,7 @@ document.addEventListener('DOMContentLoaded', function() {
     let quizData = null;
     let currentQuestionIndex = 0;
     let timer = null;
+    let resultsShown = false;
     
     // Load the quiz data
     loadQuiz(sessionCode);
@@ -41,7 +45,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 monitorSession();
 
                 // After loading quiz data, check the current session status and update UI accordingly
-                fetch(`/session_status/${sessionCode}`)
+                fetch(`/session_status/${sessionCode}?role=host`, { headers: hostHeaders })
                     .then(response => response.json())
                     .then(status => {
                         if (status.error) {
@@ -69,7 +73,7 @@ document.addEventListener('DOMContentLoaded', function() {
     function monitorSession() {
         // Update session status periodically
         setInterval(() => {
-            fetch(`/session_status/${sessionCode}`)
+            fetch(`/session_status/${sessionCode}?role=host`, { headers: hostHeaders })
                 .then(response => response.json())
                 .then(status => {
                     if (status.error) {
@@ -80,11 +84,14 @@ document.addEventListener('DOMContentLoaded', function() {
                     // Update participant count
                     participantCount.textContent = status.participant_count || 0;
                     
-                    // Update participants list
-                    updateParticipantsList(status.participants || []);
+                    // The list only changes while players join, during the quiz the counts are enough
+                    if (status.status === 'waiting') {
+                        loadParticipants();
+                    }
                     
                     // Update UI based on session status
                     if (status.status === 'waiting') {
+                        resultsShown = false;
                         // Show waiting room
                         waitingRoom.classList.remove('hidden');
                         quizControls.classList.add('hidden');
@@ -117,7 +124,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 });
             
             // Update responses summary
-            fetch(`/responses/${sessionCode}`)
+            fetch(`/responses/${sessionCode}/summary`, { headers: hostHeaders })
                 .then(response => response.json())
                 .then(data => {
                     if (!data.error) {
@@ -130,8 +137,22 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 2000); // Update every 2 seconds
     }
     
+    // Function to load the first page of participants
+    function loadParticipants() {
+        fetch(`/lobby_participants/${sessionCode}`, { headers: hostHeaders })
+            .then(response => response.json())
+            .then(data => {
+                if (!data.error) {
+                    updateParticipantsList(data.participants, data.total);
+                }
+            })
+            .catch(error => {
+                console.error('Error getting participants:', error);
+            });
+    }
+    
     // Function to update participants list
-    function updateParticipantsList(participants) {
+    function updateParticipantsList(participants, total) {
         participantsList.innerHTML = '';
         
         if (participants.length === 0) {
@@ -148,29 +169,31 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             participantsList.appendChild(li);
         });
+        
+        if (total > participants.length) {
+            const li = document.createElement('li');
+            li.textContent = `and ${total - participants.length} more`;
+            participantsList.appendChild(li);
+        }
     }
     
     // Function to update responses summary
     function updateResponsesSummary(data) {
-        const responses = data.responses || {};
-        const currentQ = data.current_question || 0;
-        const participants = data.participants || [];
+        const answerCounts = data.answer_counts || {};
         
-        if (!responses[currentQ]) {
+        if (data.total_responses === 0) {
             responsesSummaryContainer.innerHTML = '<p>No responses yet for this question</p>';
             return;
         }
         
-        // Count responses
-        const responseCount = Object.keys(responses[currentQ]).length;
-        const totalParticipants = participants.filter(p => !p.is_host).length; // Don't count host
+        const question = quizData && quizData.questions[data.question];
+        const answers = question ? question.answers : [];
         
         responsesSummaryContainer.innerHTML = `
-            <p><strong>Responses: ${responseCount}/${totalParticipants}</strong></p>
+            <p><strong>Responses: ${data.total_responses}/${data.participant_count}</strong></p>
             <div class="responses-list">
-                ${Object.entries(responses[currentQ]).map(([participantId, response]) => {
-                    const participant = participants.find(p => p.id == participantId);
-                    return `<div class="response-item">${participant ? participant.name : 'Unknown'} - Answered</div>`;
+                ${answers.map(answer => {
+                    return `<div class="response-item">${answer.answer_text} - ${answerCounts[answer.id] || 0}</div>`;
                 }).join('')}
             </div>
         `;
@@ -295,11 +318,38 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Function to show results
     function showResults() {
-        // In a real implementation, this would show detailed results
-        document.getElementById('results-container').innerHTML = `
-            <p>Quiz completed! Check the leaderboard for final results.</p>
+        // Results no longer change once shown, avoid refetching them on every poll
+        if (resultsShown) {
+            return;
+        }
+        resultsShown = true;
+        
+        const resultsContainer = document.getElementById('results-container');
+        resultsContainer.innerHTML = `
+            <div id="participant-scores"></div>
             <a href="/leaderboard/${quizData.id}/view" class="btn primary-btn">View Leaderboard</a>
             <a href="/live_results/${sessionCode}" class="btn secondary-btn">View Live Results</a>
         `;
+        
+        // Fetch the results of every participant in one request
+        fetch(`/quiz_results/${quizData.id}?session_code=${sessionCode}`)
+            .then(response => response.json())
+            .then(data => {
+                if (data.error) {
+                    console.error('Error getting results:', data.error);
+                    return;
+                }
+                
+                document.getElementById('participant-scores').innerHTML = `
+                    <div class="responses-list">
+                        ${data.results.map(result => {
+                            return `<div class="response-item">${result.participant_name} - ${result.score} (${result.percentage}%)</div>`;
+                        }).join('')}
+                    </div>
+                `;
+            })
+            .catch(error => {
+                console.error('Error getting results:', error);
+            });
     }
 });
\ No newline at end of file
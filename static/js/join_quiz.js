@@ -42,7 +42,7 @@ document.addEventListener('DOMContentLoaded', function() {
         joinError.classList.add('hidden');
         
         // Join the session
-        fetch(`/join_session/${sessionCode}`, {
+        fetchWithRetry(`/join_session/${sessionCode}`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -55,6 +55,9 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(response => response.json())
         .then(data => {
             if (data.success) {
+                // The participant page resumes with the token instead of joining again
+                localStorage.setItem('participantName', participantName);
+                localStorage.setItem(`resumeToken:${sessionCode}`, data.resume_token);
                 // Redirect to the participant page
                 window.location.href = `/quiz/${sessionCode}`;
             } else {
@@ -67,6 +70,20 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Function to send a request, retrying when the server asks us to back off (429)
+    function fetchWithRetry(url, options, attemptsLeft = 5) {
+        return fetch(url, options).then(response => {
+            if (response.status === 429 && attemptsLeft > 0) {
+                const retryAfter = parseInt(response.headers.get('Retry-After') || '1', 10);
+                // Spread retries so a whole room does not come back at the same instant
+                const delay = (retryAfter + Math.random() * retryAfter) * 1000;
+                return new Promise(resolve => setTimeout(resolve, delay))
+                    .then(() => fetchWithRetry(url, options, attemptsLeft - 1));
+            }
+            return response;
+        });
+    }
+    
     // Function to show error message
     function showError(message) {
         joinError.textContent = message;
@@ -1,8 +1,11 @@
 document.addEventListener('DOMContentLoaded', function() {
-    // Get the session code from the URL
-    const sessionCode = window.location.pathname.split('/').pop();
+    // Get the session code the page was rendered for, /start_lobby URLs end in the quiz ID
+    const sessionCode = document.body.dataset.sessionCode || window.location.pathname.split('/').pop();
     document.getElementById('session-code-display').textContent = sessionCode;
     
+    // Set when the quiz list opened this lobby, proves to the server that this page belongs to the host
+    const hostHeaders = { 'X-Host-Token': localStorage.getItem(`hostToken:${sessionCode}`) || '' };
+    
     // Generate QR code for the quiz link
     const quizUrl = `${window.location.origin}/quiz/${sessionCode}`;
     const qr = new QRious({
@@ -32,7 +35,8 @@ document.addEventListener('DOMContentLoaded', function() {
     // Load quiz data
     loadQuizBySessionCode(sessionCode);
     
-    // Monitor session status
+    // Show who is here, then monitor session status
+    loadParticipants();
     setInterval(monitorSession, 2000);
     
     // Function to load quiz by session code
@@ -48,7 +52,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 quizData = data;
 
                 // After loading quiz data, check the current session status and update UI accordingly
-                fetch(`/session_status/${sessionCode}`)
+                fetch(`/session_status/${sessionCode}?role=host`, { headers: hostHeaders })
                     .then(response => response.json())
                     .then(status => {
                         if (status.error) {
@@ -74,7 +78,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Function to monitor session status
     function monitorSession() {
-        fetch(`/session_status/${sessionCode}`)
+        fetch(`/session_status/${sessionCode}?role=host`, { headers: hostHeaders })
             .then(response => response.json())
             .then(status => {
                 if (status.error) {
@@ -85,8 +89,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 // Update participants count
                 participantsCount.textContent = status.participant_count || 0;
                 
-                // Update participants list
-                updateParticipantsList(status.participants || []);
+                // The list only changes while players join, during the quiz the counts are enough
+                if (status.status === 'waiting') {
+                    loadParticipants();
+                }
                 
                 // Update UI based on session status
                 if (status.status === 'active') {
@@ -116,7 +122,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 
                 // Update responses summary
                 if (status.status === 'active') {
-                    updateResponsesSummary(status.responses || {}, status.current_question || 0);
+                    updateResponsesSummary(status.response_counts || {}, status.current_question || 0, status.player_count || 0);
                 }
             })
             .catch(error => {
@@ -124,8 +130,22 @@ document.addEventListener('DOMContentLoaded', function() {
             });
     }
     
+    // Function to load the first page of participants
+    function loadParticipants() {
+        fetch(`/lobby_participants/${sessionCode}`, { headers: hostHeaders })
+            .then(response => response.json())
+            .then(data => {
+                if (!data.error) {
+                    updateParticipantsList(data.participants, data.total);
+                }
+            })
+            .catch(error => {
+                console.error('Error getting participants:', error);
+            });
+    }
+    
     // Function to update participants list
-    function updateParticipantsList(participants) {
+    function updateParticipantsList(participants, total) {
         participantsList.innerHTML = '';
         
         if (participants.length === 0) {
@@ -142,6 +162,12 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             participantsList.appendChild(li);
         });
+        
+        if (total > participants.length) {
+            const li = document.createElement('li');
+            li.textContent = `and ${total - participants.length} more`;
+            participantsList.appendChild(li);
+        }
     }
     
     // Function to show a question
@@ -178,23 +204,11 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Function to update responses summary
-    function updateResponsesSummary(responses, currentQuestion) {
-        const currentQResponses = responses[currentQuestion] || {};
-        const totalParticipants = document.querySelectorAll('#participants-list li:not(:first-child)').length; // Exclude "No participants yet" if present
-        
-        let responseCount = 0;
-        for (const participantId in currentQResponses) {
-            responseCount++;
-        }
+    function updateResponsesSummary(responseCounts, currentQuestion, totalParticipants) {
+        const responseCount = responseCounts[currentQuestion] || 0;
         
         responsesSummaryContainer.innerHTML = `
             <p><strong>Responses: ${responseCount}/${totalParticipants}</strong></p>
-            <div class="responses-list">
-                ${Object.entries(currentQResponses).map(([participantId, response]) => {
-                    // In a real implementation, we would get participant name by ID
-                    return `<div class="response-item">Participant responded</div>`;
-                }).join('')}
-            </div>
         `;
     }
     
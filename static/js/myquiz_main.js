@@ -69,7 +69,7 @@ document.addEventListener('DOMContentLoaded', function() {
         document.querySelectorAll('.start-lobby-btn').forEach(button => {
             button.addEventListener('click', function() {
                 const quizId = this.getAttribute('data-quiz-id');
-                window.location.href = `/start_lobby/${quizId}`;
+                createLobby(quizId);
             });
         });
 
@@ -97,12 +97,14 @@ document.addEventListener('DOMContentLoaded', function() {
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ quiz_id: quizId })
+            // Only the browser that created the quiz holds its host key
+            body: JSON.stringify({ quiz_id: quizId, host_key: localStorage.getItem(`hostKey:${quizId}`) })
         })
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                // Redirect to the lobby page
+                // Keep the host token for the lobby and host pages, then go to the lobby
+                localStorage.setItem(`hostToken:${data.session_code}`, data.host_token);
                 window.location.href = `/lobby/${data.session_code}`;
             } else {
                 alert('Error creating lobby: ' + (data.error || 'Unknown error'));
@@ -17,27 +17,82 @@ document.addEventListener('DOMContentLoaded', function() {
     let currentQuestionIndex = 0;
     let timer = null;
     let timeLeft = 30;
+    let questionDeadline = null; // Server epoch seconds
+    let clockOffset = 0; // Server clock minus local clock, in seconds
+    let answeredQuestions = {}; // Question index -> answer id already submitted
+    const resumeTokenKey = `resumeToken:${sessionCode}`;
     
-    // Get participant name from localStorage or prompt
-    let participantName = localStorage.getItem('participantName');
-    if (!participantName) {
-        participantName = prompt('Please enter your name:');
-        if (participantName) {
-            localStorage.setItem('participantName', participantName);
-        }
+    // Pick up where we left off after a reload or a dropped connection, otherwise join
+    const resumeToken = localStorage.getItem(resumeTokenKey);
+    if (resumeToken) {
+        resumeSession(resumeToken);
+    } else {
+        joinSession();
     }
     
-    if (!participantName) {
-        alert('A name is required to participate in the quiz');
-        return;
+    // Function to send a request, retrying when the server asks us to back off (429)
+    function fetchWithRetry(url, options, attemptsLeft = 5) {
+        return fetch(url, options).then(response => {
+            if (response.status === 429 && attemptsLeft > 0) {
+                const retryAfter = parseInt(response.headers.get('Retry-After') || '1', 10);
+                // Spread retries so a whole room does not come back at the same instant
+                const delay = (retryAfter + Math.random() * retryAfter) * 1000;
+                return new Promise(resolve => setTimeout(resolve, delay))
+                    .then(() => fetchWithRetry(url, options, attemptsLeft - 1));
+            }
+            return response;
+        });
     }
     
-    // Join the session
-    joinSession();
+    // Function to resume the session from memory, without joining again
+    function resumeSession(token) {
+        fetchWithRetry(`/resume_session/${sessionCode}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                resume_token: token
+            })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                participantId = data.participant_id;
+                answeredQuestions = data.answers;
+                syncDeadline(data);
+                
+                // Start monitoring the session
+                monitorSession();
+            } else {
+                // Expired token or the server lost the session, join from scratch
+                localStorage.removeItem(resumeTokenKey);
+                joinSession();
+            }
+        })
+        .catch(error => {
+            console.error('Error resuming session:', error);
+            joinSession();
+        });
+    }
     
     // Function to join the session
     function joinSession() {
-        fetch(`/join_session/${sessionCode}`, {
+        // Get participant name from localStorage or prompt
+        let participantName = localStorage.getItem('participantName');
+        if (!participantName) {
+            participantName = prompt('Please enter your name:');
+            if (participantName) {
+                localStorage.setItem('participantName', participantName);
+            }
+        }
+        
+        if (!participantName) {
+            alert('A name is required to participate in the quiz');
+            return;
+        }
+        
+        fetchWithRetry(`/join_session/${sessionCode}`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -51,6 +106,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(data => {
             if (data.success) {
                 participantId = data.participant_id;
+                localStorage.setItem(resumeTokenKey, data.resume_token);
                 
                 // Start monitoring the session
                 monitorSession();
@@ -75,6 +131,9 @@ document.addEventListener('DOMContentLoaded', function() {
                         return;
                     }
                     
+                    // Keep the countdown in sync with the server deadline
+                    syncDeadline(status);
+                    
                     // Update participant count if available
                     if (status.participant_count !== undefined) {
                         document.getElementById('participant-count').textContent = status.participant_count;
@@ -89,7 +148,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
                         // Load quiz data if not already loaded
                         if (!quizData) {
-                            loadQuizBySessionCode(sessionCode);
+                            loadQuizBySessionCode(sessionCode, status.content_hash);
                         } else {
                             // Update question if needed (only if quizData is already loaded)
                             if (status.current_question !== currentQuestionIndex) {
@@ -119,8 +178,10 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Function to load quiz by session code
-    function loadQuizBySessionCode(code) {
-        fetch(`/api/quiz_by_code/${code}`)
+    function loadQuizBySessionCode(code, contentHash) {
+        // Pinned quiz versions are immutable and can come straight from the browser cache
+        const url = contentHash ? `/api/quiz_version/${contentHash}` : `/api/quiz_by_code/${code}`;
+        fetch(url)
             .then(response => response.json())
             .then(data => {
                 if (data.error) {
@@ -139,6 +200,8 @@ document.addEventListener('DOMContentLoaded', function() {
                             return;
                         }
 
+                        syncDeadline(status);
+
                         if (status.status === 'active' && status.current_question !== currentQuestionIndex) {
                             currentQuestionIndex = status.current_question;
                             if (currentQuestionIndex < quizData.questions.length) {
@@ -202,20 +265,50 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Start the timer
         startTimer();
+        
+        // Keep an answer sent before a reload locked in
+        if (answeredQuestions[index] !== undefined) {
+            clearInterval(timer);
+            document.querySelectorAll('.answer-btn').forEach(btn => {
+                btn.disabled = true;
+                btn.classList.toggle('selected', Number(btn.dataset.answerId) === answeredQuestions[index]);
+            });
+        }
+    }
+    
+    // Function to remember the question deadline sent by the server
+    function syncDeadline(status) {
+        if (status.server_time !== undefined) {
+            clockOffset = status.server_time - Date.now() / 1000;
+        }
+        questionDeadline = status.question_deadline || null;
+    }
+    
+    // Function to get the seconds left before the server deadline
+    function secondsLeft() {
+        if (!questionDeadline) {
+            return 30;
+        }
+        const serverNow = Date.now() / 1000 + clockOffset;
+        return Math.max(0, Math.ceil(questionDeadline - serverNow));
     }
     
     // Function to start the timer
     function startTimer() {
-        timeLeft = 30;
+        timeLeft = secondsLeft();
         timerElement.textContent = timeLeft;
         
         clearInterval(timer);
         timer = setInterval(() => {
-            timeLeft--;
+            timeLeft = secondsLeft();
             timerElement.textContent = timeLeft;
             
             if (timeLeft <= 0) {
                 clearInterval(timer);
+                // The server rejects answers after the deadline
+                document.querySelectorAll('.answer-btn').forEach(btn => {
+                    btn.disabled = true;
+                });
             }
         }, 1000);
     }
@@ -227,24 +320,29 @@ document.addEventListener('DOMContentLoaded', function() {
             btn.disabled = true;
         });
         
-        // Submit the answer
-        fetch('/submit_answer', {
+        // Submit the answer, the key lets the server drop retried submissions
+        fetchWithRetry('/submit_answer', {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'Idempotency-Key': `${participantId}-${questionId}-${answerId}-${Date.now()}`
             },
             body: JSON.stringify({
                 participant_id: participantId,
                 question_id: questionId,
                 answer_id: answerId,
-                session_code: sessionCode
+                session_code: sessionCode,
+                resume_token: localStorage.getItem(resumeTokenKey)
             })
         })
         .then(response => response.json())
         .then(data => {
             if (data.success) {
+                answeredQuestions[currentQuestionIndex] = answerId;
                 // Show feedback
                 alert('Answer submitted!');
+            } else if (data.late) {
+                alert('Time is up! Your answer was not counted.');
             } else {
                 alert('Error submitting answer');
             }
@@ -156,10 +156,24 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 1000);
     }
     
+    // Function to send a request, retrying when the server asks us to back off (429)
+    function fetchWithRetry(url, options, attemptsLeft = 5) {
+        return fetch(url, options).then(response => {
+            if (response.status === 429 && attemptsLeft > 0) {
+                const retryAfter = parseInt(response.headers.get('Retry-After') || '1', 10);
+                // Spread retries so a whole room does not come back at the same instant
+                const delay = (retryAfter + Math.random() * retryAfter) * 1000;
+                return new Promise(resolve => setTimeout(resolve, delay))
+                    .then(() => fetchWithRetry(url, options, attemptsLeft - 1));
+            }
+            return response;
+        });
+    }
+    
     // Function to select an answer
     function selectAnswer(answerId, questionId) {
         // Submit the answer
-        fetch('/submit_answer', {
+        fetchWithRetry('/submit_answer', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -167,7 +181,8 @@ document.addEventListener('DOMContentLoaded', function() {
             body: JSON.stringify({
                 participant_id: participantId,
                 question_id: questionId,
-                answer_id: answerId
+                answer_id: answerId,
+                quiz_id: quizId
             })
         })
         .then(response => response.json())
@@ -0,0 +1,259 @@
+# Embedded SQLite storage backend, a drop-in for the MySQL connections used by app.py
+import functools
+import queue
+import re
+import sqlite3
+from datetime import datetime
+
+import mysql.connector
+
+# Errors raised by any storage backend, for `except DATABASE_ERRORS as err`
+DATABASE_ERRORS = (mysql.connector.Error, sqlite3.Error)
+
+# Applied to every SQLite connection when it is opened
+SQLITE_PRAGMAS = (
+    # Readers never block the writer and the writer never blocks readers
+    "PRAGMA journal_mode = WAL",
+    # Safe with WAL, commits no longer wait for an fsync of the database file
+    "PRAGMA synchronous = NORMAL",
+    # Deletes cascade to questions, answers, participants and responses
+    "PRAGMA foreign_keys = ON",
+    # Wait for a competing writer instead of failing with "database is locked"
+    "PRAGMA busy_timeout = 5000",
+    # 64 MB page cache and 256 MB of memory mapped reads
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Same tables and keys as init_db, in SQLite's dialect
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS quizzes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        session_code VARCHAR(10) UNIQUE
+    );
+
+    CREATE TABLE IF NOT EXISTS questions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quiz_id INTEGER NOT NULL REFERENCES quizzes(id) ON DELETE CASCADE,
+        question_text TEXT NOT NULL,
+        question_number INTEGER DEFAULT 1
+    );
+    CREATE INDEX IF NOT EXISTS idx_questions_quiz ON questions (quiz_id);
+
+    CREATE TABLE IF NOT EXISTS answers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+        answer_text VARCHAR(255) NOT NULL,
+        image_url VARCHAR(500),
+        is_correct BOOLEAN DEFAULT FALSE
+    );
+    CREATE INDEX IF NOT EXISTS idx_answers_question ON answers (question_id);
+
+    CREATE TABLE IF NOT EXISTS participants (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quiz_id INTEGER NOT NULL REFERENCES quizzes(id) ON DELETE CASCADE,
+        participant_name VARCHAR(255) NOT NULL,
+        session_code VARCHAR(10),
+        is_host BOOLEAN DEFAULT FALSE,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_participants_quiz ON participants (quiz_id);
+    CREATE INDEX IF NOT EXISTS idx_participants_session ON participants (session_code, participant_name);
+
+    CREATE TABLE IF NOT EXISTS responses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        participant_id INTEGER NOT NULL REFERENCES participants(id) ON DELETE CASCADE,
+        question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+        answer_id INTEGER REFERENCES answers(id) ON DELETE SET NULL,
+        responded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (participant_id, question_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_responses_question ON responses (question_id);
+
+    CREATE TABLE IF NOT EXISTS quiz_versions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quiz_id INTEGER NOT NULL REFERENCES quizzes(id) ON DELETE CASCADE,
+        version INTEGER NOT NULL,
+        content_hash CHAR(64) NOT NULL,
+        content TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (quiz_id, version)
+    );
+    CREATE INDEX IF NOT EXISTS idx_versions_hash ON quiz_versions (content_hash);
+
+    CREATE TABLE IF NOT EXISTS participant_scores (
+        participant_id INTEGER PRIMARY KEY REFERENCES participants(id) ON DELETE CASCADE,
+        quiz_id INTEGER NOT NULL,
+        answered_questions INTEGER NOT NULL DEFAULT 0,
+        correct_answers INTEGER NOT NULL DEFAULT 0,
+        archived_answered INTEGER NOT NULL DEFAULT 0,
+        archived_correct INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_scores_quiz ON participant_scores (quiz_id, correct_answers);
+    -- Stands in for MySQL's ON UPDATE CURRENT_TIMESTAMP
+    CREATE TRIGGER IF NOT EXISTS scores_updated_at AFTER UPDATE OF answered_questions, correct_answers
+    ON participant_scores BEGIN
+        UPDATE participant_scores SET updated_at = CURRENT_TIMESTAMP WHERE participant_id = NEW.participant_id;
+    END;
+
+    CREATE TABLE IF NOT EXISTS response_archives (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quiz_id INTEGER NOT NULL REFERENCES quizzes(id) ON DELETE CASCADE,
+        archive_path VARCHAR(255) NOT NULL,
+        participants INTEGER NOT NULL,
+        responses INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_archives_quiz ON response_archives (quiz_id);
+
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER NOT NULL
+    );
+"""
+
+# Columns added to a table after it first shipped, as (table, column, definition)
+SQLITE_ADDED_COLUMNS = (
+    ('participant_scores', 'archived_answered', 'INTEGER NOT NULL DEFAULT 0'),
+    ('participant_scores', 'archived_correct', 'INTEGER NOT NULL DEFAULT 0'),
+)
+
+# TIMESTAMP columns come back as datetimes, as they do from MySQL
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode('utf-8')))
+
+
+@functools.lru_cache(maxsize=512)
+def translate_sql(sql):
+    """Rewrite a MySQL statement from app.py into SQLite's dialect
+
+    Covers what app.py uses: %s placeholders, INSERT IGNORE,
+    ON DUPLICATE KEY UPDATE with VALUES(column) and LOCK IN SHARE MODE, which
+    SQLite does not need as it runs one writer at a time. Translations are cached,
+    and sqlite3 keeps the compiled statements of each connection, so
+    repeated queries skip both steps.
+    """
+    sql = sql.replace('%s', '?')
+    sql = re.sub(r'\bINSERT\s+IGNORE\b', 'INSERT OR IGNORE', sql)
+    sql = re.sub(r'\s+LOCK\s+IN\s+SHARE\s+MODE\b', '', sql)
+    upsert = re.search(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', sql)
+    if upsert:
+        updates = re.sub(r'\bVALUES\((\w+)\)', r'excluded.\1', sql[upsert.end():])
+        sql = f"{sql[:upsert.start()]}ON CONFLICT DO UPDATE SET{updates}"
+    return sql
+
+
+class SQLiteCursor:
+    """Cursor with the mysql.connector interface used by app.py"""
+
+    def __init__(self, cursor, dictionary=False):
+        self.cursor = cursor
+        self.dictionary = dictionary
+
+    def execute(self, sql, params=()):
+        self.cursor.execute(translate_sql(sql), params)
+
+    def _row(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self.cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self.cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self.cursor.fetchall()]
+
+    @property
+    def lastrowid(self):
+        return self.cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    def close(self):
+        self.cursor.close()
+
+
+class SQLiteConnection:
+    """Connection borrowed from a SQLite pool, closed like a pooled MySQL one
+
+    close() rolls back whatever was not committed and hands the underlying
+    connection, with its compiled statements, back to the pool.
+    """
+
+    def __init__(self, conn, release):
+        self.conn = conn
+        self.release = release
+
+    def cursor(self, dictionary=False):
+        return SQLiteCursor(self.conn.cursor(), dictionary)
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        if self.conn is None:
+            return
+        if self.conn.in_transaction:
+            self.conn.rollback()
+        conn, self.conn = self.conn, None
+        self.release(conn)
+
+
+def sqlite_factory(path, pool_size=8):
+    """Connection factory for a SQLite database file backed by a pool shared across threads
+
+    The threaded development server starts a thread per request, so
+    connections are pooled rather than kept per thread. At most pool_size
+    idle connections are kept; when all are busy a new one is opened and
+    closed again on release instead of making the request wait.
+    """
+    idle = queue.LifoQueue(maxsize=pool_size)
+
+    def open_connection():
+        conn = sqlite3.connect(
+            path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            # Take the write lock when a transaction starts writing, so two
+            # writers queue on busy_timeout instead of deadlocking
+            isolation_level='IMMEDIATE',
+            cached_statements=256,
+            # Pooled connections move between request threads, one at a time
+            check_same_thread=False
+        )
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def release(conn):
+        try:
+            idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def connect():
+        try:
+            conn = idle.get_nowait()
+        except queue.Empty:
+            conn = open_connection()
+        return SQLiteConnection(conn, release)
+
+    return connect
+
+
+def create_sqlite_schema(conn):
+    """Create every table of a SQLite database that does not exist yet, and add missing columns"""
+    conn.conn.executescript(SQLITE_SCHEMA)
+    for table, column, definition in SQLITE_ADDED_COLUMNS:
+        columns = [row[1] for row in conn.conn.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            conn.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    conn.conn.commit()
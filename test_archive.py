@@ -0,0 +1,71 @@
+# Tests of moving the raw responses of idle quizzes to cold storage
+import os
+from datetime import datetime
+
+import app
+import archive
+
+
+def play_quiz(client):
+    """Play a two question quiz with two players to the end and return (quiz_id, participant ids)"""
+    created = client.post('/create_quiz', json={'title': 'Archived quiz', 'questions': [
+        {'question': 'Q1', 'answers': [{'text': 'a', 'is_correct': True}, {'text': 'b'}]},
+        {'question': 'Q2', 'answers': [{'text': 'c'}, {'text': 'd', 'is_correct': True}]},
+    ]}).json
+    code = created['session_code']
+    questions = client.get(f'/api/quiz_by_code/{code}').json['questions']
+    players = [client.post(f'/join_session/{code}', json={'participant_name': name}).json['participant_id']
+               for name in ('amy', 'bob')]
+    client.post(f'/start_quiz_now/{code}')
+    for index, question in enumerate(questions):
+        for player, answer in zip(players, question['answers']):
+            client.post('/submit_answer', json={
+                'participant_id': player, 'question_id': question['id'],
+                'answer_id': answer['id'], 'session_code': code
+            })
+        if index < len(questions) - 1:
+            client.post(f'/next_question/{code}')
+    client.post(f'/end_quiz/{code}')
+    return created['quiz_id'], players
+
+
+def results(client, quiz_id, participant_id):
+    app.finished_results.clear()
+    return client.get(f'/quiz_results/{quiz_id}/{participant_id}').json
+
+
+def test_archiving_keeps_scores_in_the_database(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'ARCHIVE_DIR', str(tmp_path / 'archive'))
+    quiz_id, players = play_quiz(client)
+    leaderboard = client.get(f'/leaderboard/{quiz_id}').json
+    before = results(client, quiz_id, players[0])
+
+    assert app.archive_quiz(quiz_id) == (2, 4)
+    assert client.get(f'/leaderboard/{quiz_id}').json == leaderboard
+    assert results(client, quiz_id, players[0]) == before
+
+    # Nothing left to move, and rebuilding scores keeps the archived part
+    assert app.archive_quiz(quiz_id) is None
+    app.backfill_participant_scores()
+    assert client.get(f'/leaderboard/{quiz_id}').json == leaderboard
+
+
+def test_unreadable_archive_only_loses_answers(client, tmp_path, monkeypatch):
+    archive_dir = tmp_path / 'archive'
+    monkeypatch.setattr(app, 'ARCHIVE_DIR', str(archive_dir))
+    quiz_id, players = play_quiz(client)
+    leaderboard = client.get(f'/leaderboard/{quiz_id}').json
+    app.archive_quiz(quiz_id)
+
+    for folder, _, files in os.walk(archive_dir):
+        for name in files:
+            os.remove(os.path.join(folder, name))
+    archive.read_archive.cache_clear()
+
+    assert client.get(f'/leaderboard/{quiz_id}').json == leaderboard
+    assert all(question['selected_answer_id'] is None for question in results(client, quiz_id, players[0])['questions'])
+
+
+def test_archive_names_are_unique_within_a_second():
+    archived_at = datetime(2026, 1, 2, 3, 4, 5)
+    assert archive.archive_name(7, archived_at) != archive.archive_name(7, archived_at)
@@ -0,0 +1,119 @@
+# Tests of read/write routing, with two SQLite files standing in for the primary and the replica
+import sqlite3
+import time
+
+import app
+from db_router import DatabaseRouter
+from storage import DATABASE_ERRORS, sqlite_factory
+
+
+def make_node(path, name):
+    connect = sqlite_factory(str(path))
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE node (name TEXT)")
+    cursor.execute("INSERT INTO node (name) VALUES (%s)", (name,))
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return connect
+
+
+def node_name(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM node")
+    name = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return name
+
+
+def make_router(tmp_path, lag=0, **kwargs):
+    lag_state = {'lag': lag}
+    router = DatabaseRouter(
+        primary=make_node(tmp_path / 'primary.db', 'primary'),
+        replica=make_node(tmp_path / 'replica.db', 'replica'),
+        lag_probe=lambda conn: lag_state['lag'],
+        max_lag_seconds=5,
+        lag_check_interval=0,
+        errors=DATABASE_ERRORS,
+        **kwargs
+    )
+    return router, lag_state
+
+
+def test_reads_use_replica_and_writes_use_primary(tmp_path):
+    router, _ = make_router(tmp_path)
+    assert node_name(router.read_connection()) == 'replica'
+    assert node_name(router.write_connection()) == 'primary'
+
+
+def test_reads_use_primary_without_replica(tmp_path):
+    router = DatabaseRouter(primary=make_node(tmp_path / 'primary.db', 'primary'), errors=DATABASE_ERRORS)
+    assert node_name(router.read_connection()) == 'primary'
+
+
+def test_prefer_primary_reads_from_primary(tmp_path):
+    router, _ = make_router(tmp_path)
+    assert node_name(router.read_connection(prefer_primary=True)) == 'primary'
+
+
+def test_lagging_replica_is_skipped_until_it_catches_up(tmp_path):
+    router, lag_state = make_router(tmp_path, lag=30)
+    assert node_name(router.read_connection()) == 'primary'
+    assert router.status()['replica_lag'] == 30
+
+    lag_state['lag'] = 1
+    assert node_name(router.read_connection()) == 'replica'
+
+
+def test_broken_replication_is_skipped(tmp_path):
+    router, lag_state = make_router(tmp_path, lag=None)
+    assert node_name(router.read_connection()) == 'primary'
+    assert not router.status()['replica_ok']
+
+
+def test_unreachable_replica_falls_back_to_primary(tmp_path):
+    def unreachable():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    router = DatabaseRouter(
+        primary=make_node(tmp_path / 'primary.db', 'primary'),
+        replica=unreachable,
+        lag_check_interval=0,
+        errors=DATABASE_ERRORS
+    )
+    assert node_name(router.read_connection()) == 'primary'
+    assert not router.status()['replica_ok']
+
+
+def test_client_reads_stick_to_primary_after_a_write(tmp_path, monkeypatch):
+    router, _ = make_router(tmp_path)
+    monkeypatch.setattr(app, 'db_router', router)
+
+    with app.app.test_request_context('/submit_answer', method='POST'):
+        app.get_db_connection().close()
+        response = app.set_read_your_writes_cookie(app.app.response_class())
+        cookie = response.headers['Set-Cookie']
+    assert cookie.startswith(app.STICKY_COOKIE + '=')
+
+    sticky_until = time.time() + app.READ_YOUR_WRITES_SECONDS
+    with app.app.test_request_context(headers={'Cookie': f"{app.STICKY_COOKIE}={sticky_until}"}):
+        assert node_name(app.get_read_connection()) == 'primary'
+
+    with app.app.test_request_context(headers={'Cookie': f"{app.STICKY_COOKIE}={time.time() - 1}"}):
+        assert node_name(app.get_read_connection()) == 'replica'
+
+
+def test_results_of_a_finished_room_are_read_from_primary(tmp_path, monkeypatch):
+    router, _ = make_router(tmp_path)
+    monkeypatch.setattr(app, 'db_router', router)
+    session = app.new_session(1, 1)
+    app.active_sessions['RTEST1'] = session
+    try:
+        with app.app.test_request_context():
+            assert node_name(app.get_results_connection('RTEST1')) == 'replica'
+            session['status'] = 'results'
+            assert node_name(app.get_results_connection('RTEST1')) == 'primary'
+    finally:
+        app.active_sessions.pop('RTEST1')
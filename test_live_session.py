@@ -0,0 +1,92 @@
+# Tests of live session rules, run against an embedded SQLite database
+import app
+
+
+def create_quiz(client):
+    return client.post('/create_quiz', json={'title': 'Test quiz', 'questions': [
+        {'question': 'Q1', 'answers': [{'text': 'a', 'is_correct': True}, {'text': 'b'}]},
+        {'question': 'Q2', 'answers': [{'text': 'c'}, {'text': 'd', 'is_correct': True}]},
+    ]}).json
+
+
+def create_room(client):
+    """Create a two question quiz and return (session_code, quiz content)"""
+    code = create_quiz(client)['session_code']
+    return code, client.get(f'/api/quiz_by_code/{code}').json
+
+
+def open_lobby(client):
+    """Create a quiz, open its lobby as the creator and return (session_code, host headers)"""
+    created = create_quiz(client)
+    lobby = client.post('/create_lobby', json={'quiz_id': created['quiz_id'], 'host_key': created['host_key']}).json
+    return lobby['session_code'], {'X-Host-Token': lobby['host_token']}
+
+
+def submit(client, code, participant_id, question, answer):
+    return client.post('/submit_answer', json={
+        'participant_id': participant_id,
+        'question_id': question['id'],
+        'answer_id': answer['id'],
+        'session_code': code
+    })
+
+
+def test_answers_are_rejected_before_the_quiz_starts(client):
+    code, quiz = create_room(client)
+    participant_id = client.post(f'/join_session/{code}', json={'participant_name': 'amy'}).json['participant_id']
+    question = quiz['questions'][0]
+
+    response = submit(client, code, participant_id, question, question['answers'][0])
+    assert response.status_code == 409
+    assert response.json['late']
+    assert app.active_sessions[code]['responses'] == {}
+
+
+def test_answers_are_rejected_after_the_quiz_ends(client):
+    code, quiz = create_room(client)
+    participant_id = client.post(f'/join_session/{code}', json={'participant_name': 'amy'}).json['participant_id']
+    client.post(f'/start_quiz_now/{code}')
+    question = quiz['questions'][0]
+    assert submit(client, code, participant_id, question, question['answers'][0]).status_code == 200
+
+    client.post(f'/end_quiz/{code}')
+    response = submit(client, code, participant_id, question, question['answers'][1])
+    assert response.status_code == 409
+    stored = app.active_sessions[code]['responses']['0'][str(participant_id)]
+    assert stored['answer_id'] == question['answers'][0]['id']
+
+
+def test_only_the_quiz_creator_can_open_a_lobby_as_host(client):
+    code, quiz = create_room(client)
+    other = create_quiz(client)
+
+    assert client.post('/create_lobby', json={'quiz_id': quiz['id']}).status_code == 403
+    assert client.post('/create_lobby', json={'quiz_id': quiz['id'], 'host_key': other['host_key']}).status_code == 403
+    assert client.get(f'/session_status/{code}?role=host').status_code == 403
+    assert client.get(f'/responses/{code}/summary').status_code == 403
+
+
+def test_host_status_has_counts_and_participants_are_paged(client):
+    code, host_headers = open_lobby(client)
+    for i in range(3):
+        client.post(f'/join_session/{code}', json={'participant_name': f'p{i}'})
+
+    status = client.get(f'/session_status/{code}?role=host', headers=host_headers).json
+    assert status['player_count'] == 3
+    assert 'participants' not in status
+
+    first = client.get(f'/lobby_participants/{code}?per_page=2', headers=host_headers).json
+    second = client.get(f'/lobby_participants/{code}?per_page=2&page=2', headers=host_headers).json
+    assert first['total'] == 3
+    assert [p['name'] for p in first['participants'] + second['participants']] == ['p0', 'p1', 'p2']
+    assert client.get(f'/lobby_participants/{code}').status_code == 403
+
+
+def test_a_classroom_behind_one_address_can_join(client):
+    code, _ = create_room(client)
+    statuses = [client.post(f'/join_session/{code}', json={'participant_name': f'p{i}'}).status_code for i in range(30)]
+    assert statuses == [200] * 30
+
+    # One name hammering the join is still throttled
+    statuses = [client.post(f'/join_session/{code}', json={'participant_name': 'p0'}).status_code for _ in range(10)]
+    assert 429 in statuses
@@ -0,0 +1,51 @@
+# Tests of the request profiler's slow request list and folded output
+import os
+from collections import Counter
+
+from profiling import SamplingProfiler
+
+
+def request(duration_ms, endpoint='get_session_status'):
+    return {'endpoint': endpoint, 'duration_ms': duration_ms}
+
+
+def test_slow_requests_survive_a_burst_of_fast_ones():
+    profiler = SamplingProfiler(max_slowest=5)
+    profiler.record(request(900))
+    for _ in range(10000):
+        profiler.record(request(1))
+
+    slowest = profiler.slowest(3)
+    assert [entry['duration_ms'] for entry in slowest] == [900, 1, 1]
+    assert len(profiler.slowest_now) == 5
+
+
+def test_slow_requests_of_the_previous_window_are_kept(monkeypatch):
+    profiler = SamplingProfiler(window=60)
+    profiler.record(request(900))
+    monkeypatch.setattr(profiler, 'window_started', profiler.window_started - 61)
+    profiler.record(request(5))
+    assert [entry['duration_ms'] for entry in profiler.slowest()] == [900, 5]
+
+    monkeypatch.setattr(profiler, 'window_started', profiler.window_started - 121)
+    profiler.record(request(7))
+    assert [entry['duration_ms'] for entry in profiler.slowest()] == [7]
+
+
+def test_profiles_are_summed_and_written_on_flush(tmp_path):
+    profiler = SamplingProfiler(output_dir=str(tmp_path))
+    for _ in range(3):
+        profiler.record(request(10), Counter({'app:view;storage:execute': 2}))
+    assert not os.listdir(tmp_path)
+
+    profiler.flush()
+    with open(tmp_path / 'get_session_status.folded') as f:
+        assert f.read() == 'app:view;storage:execute 6\n'
+
+
+def test_folded_files_are_rotated_at_the_size_cap(tmp_path):
+    profiler = SamplingProfiler(output_dir=str(tmp_path), max_file_bytes=10)
+    for _ in range(2):
+        profiler.record(request(10), Counter({'app:view;storage:execute': 1}))
+        profiler.flush()
+    assert sorted(os.listdir(tmp_path)) == ['get_session_status.folded', 'get_session_status.folded.1']
@@ -0,0 +1,44 @@
+# Tests of the schema_version marker that lets workers skip migrations
+import app
+
+
+def set_marker(version):
+    conn = app.db_router.write_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM schema_version")
+    cursor.execute("INSERT INTO schema_version (version) VALUES (%s)", (version,))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def read_markers():
+    conn = app.db_router.write_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT version FROM schema_version")
+    versions = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    return versions
+
+
+def test_older_marker_is_migrated_and_moved_forward(client, monkeypatch):
+    monkeypatch.setattr(app, 'STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setattr(app, 'schema_ready', False)
+    set_marker(app.SCHEMA_VERSION - 1)
+
+    assert app.ensure_schema()
+    assert read_markers() == [app.SCHEMA_VERSION]
+
+
+def test_newer_marker_is_left_alone(client, monkeypatch):
+    monkeypatch.setattr(app, 'STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setattr(app, 'schema_ready', False)
+    set_marker(app.SCHEMA_VERSION + 1)
+
+    def no_migration():
+        raise AssertionError("an older worker must not migrate a newer schema")
+    monkeypatch.setattr(app, 'init_sqlite_db', no_migration)
+
+    assert app.ensure_schema()
+    assert read_markers() == [app.SCHEMA_VERSION + 1]
@@ -0,0 +1,122 @@
+# Tests of the SQLite backend: MySQL statement translation and the connection pool
+import sqlite3
+
+import pytest
+
+import app
+from storage import create_sqlite_schema, sqlite_factory, translate_sql
+
+
+def make_table(connect):
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE counters (name TEXT PRIMARY KEY, hits INTEGER NOT NULL)")
+    conn.commit()
+    cursor.close()
+    return conn
+
+
+def counters(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, hits FROM counters ORDER BY name")
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def test_placeholders_become_question_marks():
+    assert translate_sql("SELECT id FROM quizzes WHERE id = %s AND title = %s") == \
+        "SELECT id FROM quizzes WHERE id = ? AND title = ?"
+
+
+def test_insert_ignore_skips_duplicates(tmp_path):
+    assert translate_sql("INSERT IGNORE INTO counters (name, hits) VALUES (%s, %s)") == \
+        "INSERT OR IGNORE INTO counters (name, hits) VALUES (?, ?)"
+
+    conn = make_table(sqlite_factory(str(tmp_path / 'test.db')))
+    cursor = conn.cursor()
+    cursor.execute("INSERT IGNORE INTO counters (name, hits) VALUES (%s, %s)", ('a', 1))
+    assert cursor.rowcount == 1
+    cursor.execute("INSERT IGNORE INTO counters (name, hits) VALUES (%s, %s)", ('a', 2))
+    assert cursor.rowcount == 0
+    assert counters(conn) == [('a', 1)]
+
+
+def test_on_duplicate_key_update_becomes_an_upsert(tmp_path):
+    sql = "INSERT INTO counters (name, hits) VALUES (%s, %s) ON DUPLICATE KEY UPDATE hits = hits + VALUES(hits)"
+    assert translate_sql(sql) == \
+        "INSERT INTO counters (name, hits) VALUES (?, ?) ON CONFLICT DO UPDATE SET hits = hits + excluded.hits"
+
+    conn = make_table(sqlite_factory(str(tmp_path / 'test.db')))
+    cursor = conn.cursor()
+    cursor.execute(sql, ('a', 1))
+    cursor.execute(sql, ('a', 2))
+    assert counters(conn) == [('a', 3)]
+
+
+def test_lock_in_share_mode_is_dropped():
+    assert translate_sql("SELECT version FROM quiz_versions WHERE quiz_id = %s LIMIT 1 LOCK IN SHARE MODE") == \
+        "SELECT version FROM quiz_versions WHERE quiz_id = ? LIMIT 1"
+
+
+def test_score_upsert_inserts_then_updates_on_top_of_archived_counts(tmp_path):
+    conn = sqlite_factory(str(tmp_path / 'quiz.db'))()
+    create_sqlite_schema(conn)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO quizzes (title) VALUES (%s)", ('Quiz',))
+    quiz_id = cursor.lastrowid
+    cursor.execute("INSERT INTO questions (quiz_id, question_text) VALUES (%s, %s)", (quiz_id, 'Q1'))
+    question_id = cursor.lastrowid
+    cursor.execute("INSERT INTO answers (question_id, answer_text, is_correct) VALUES (%s, %s, %s)", (question_id, 'a', True))
+    answer_id = cursor.lastrowid
+    cursor.execute("INSERT INTO participants (quiz_id, participant_name) VALUES (%s, %s)", (quiz_id, 'amy'))
+    participant_id = cursor.lastrowid
+
+    def score():
+        cursor.execute(
+            "SELECT answered_questions, correct_answers FROM participant_scores WHERE participant_id = %s",
+            (participant_id,)
+        )
+        return cursor.fetchone()
+
+    app.refresh_participant_score(cursor, participant_id)
+    assert score() == (0, 0)
+
+    cursor.execute("INSERT INTO responses (participant_id, question_id, answer_id) VALUES (%s, %s, %s)",
+                   (participant_id, question_id, answer_id))
+    app.refresh_participant_score(cursor, participant_id)
+    assert score() == (1, 1)
+
+    cursor.execute("UPDATE participant_scores SET archived_answered = 2, archived_correct = 1 WHERE participant_id = %s",
+                   (participant_id,))
+    app.refresh_participant_score(cursor, participant_id)
+    assert score() == (3, 2)
+
+
+def test_closing_a_pooled_connection_rolls_back_and_reuses_it(tmp_path):
+    connect = sqlite_factory(str(tmp_path / 'test.db'), pool_size=1)
+    make_table(connect).close()
+
+    conn = connect()
+    raw = conn.conn
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO counters (name, hits) VALUES (%s, %s)", ('uncommitted', 1))
+    conn.close()
+    conn.close()  # A second close is a no-op
+
+    reused = connect()
+    assert reused.conn is raw
+    assert counters(reused) == []
+    reused.close()
+
+
+def test_connections_beyond_the_pool_size_are_closed(tmp_path):
+    connect = sqlite_factory(str(tmp_path / 'test.db'), pool_size=1)
+    first, second = connect(), connect()
+    kept, overflow = first.conn, second.conn
+    first.close()
+    second.close()
+
+    assert connect().conn is kept
+    with pytest.raises(sqlite3.ProgrammingError):
+        overflow.execute("SELECT 1")
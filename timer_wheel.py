@@ -0,0 +1,72 @@
+# Hashed timer wheel used to run question deadlines for live sessions
+import threading
+import time
+
+
+class TimerWheel:
+    """Schedule callbacks on a single background thread.
+
+    Timers are hashed into a fixed ring of slots by their expiry tick, so
+    scheduling and cancelling are O(1) no matter how many sessions are live.
+    Each timer is registered under a key (the session code) and scheduling a
+    new timer for the same key replaces the old one.
+    """
+
+    def __init__(self, tick_seconds=0.25, slots=512):
+        self.tick_seconds = tick_seconds
+        self.slots = [dict() for _ in range(slots)]
+        self.timers = {}  # key -> slot index
+        self.current_tick = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def schedule(self, key, delay_seconds, callback, *args):
+        """Run callback(*args) after delay_seconds, replacing any timer for key"""
+        ticks = max(1, int(round(delay_seconds / self.tick_seconds)))
+        with self.lock:
+            self._cancel_locked(key)
+            expiry_tick = self.current_tick + ticks
+            slot = expiry_tick % len(self.slots)
+            self.slots[slot][key] = (expiry_tick, callback, args)
+            self.timers[key] = slot
+            self._ensure_running_locked()
+
+    def cancel(self, key):
+        """Cancel the timer registered under key, if any"""
+        with self.lock:
+            self._cancel_locked(key)
+
+    def _cancel_locked(self, key):
+        slot = self.timers.pop(key, None)
+        if slot is not None:
+            self.slots[slot].pop(key, None)
+
+    def _ensure_running_locked(self):
+        # Called with self.lock held, so racing first schedules start a single thread
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='timer-wheel', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        next_tick_at = time.monotonic()
+        while True:
+            next_tick_at += self.tick_seconds
+            delay = next_tick_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            with self.lock:
+                self.current_tick += 1
+                slot = self.slots[self.current_tick % len(self.slots)]
+                # Timers more than one revolution away stay in the slot
+                due = [key for key, (expiry_tick, _, _) in slot.items() if expiry_tick <= self.current_tick]
+                expired = []
+                for key in due:
+                    expired.append(slot.pop(key))
+                    self.timers.pop(key, None)
+
+            for _, callback, args in expired:
+                try:
+                    callback(*args)
+                except Exception as err:
+                    print(f"Timer callback error: {err}")